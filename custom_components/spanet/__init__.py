@@ -1,65 +1,180 @@
 """The spanet integration."""
 from __future__ import annotations
 
+import asyncio
+import logging
 import uuid
 
+import aiohttp
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import aiohttp_client
 from homeassistant.helpers import device_registry as dr
+from homeassistant.util.ssl import get_default_context
 
-from .const import DOMAIN, DEVICE_ID
-from .spanet import SpaNet
+from .const import DOMAIN, DEVICE_ID, CONF_BASE_URL, OPT_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT
+from .spanet import SpaNet, SpaNetAuthFailed, SpaNetException, BASE_URL
+from .session import pool_size
 from .coordinator import Coordinator
+from .storage import account_key, async_get_auth_store, snapshot_store
+
+logger = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.CLIMATE, Platform.SWITCH, Platform.SELECT, Platform.FAN, Platform.LIGHT, Platform.NUMBER, Platform.TIME]
 
+async def async_login(hass: HomeAssistant, config_entry: ConfigEntry) -> SpaNet:
+    """Log in to SpaNET, resuming the saved session for the account if there is one.
+
+    A full password login (plus the /Devices lookup) only happens when there's
+    no saved session or its refresh token is rejected.
+    """
+    auth_store = await async_get_auth_store(hass)
+    key = account_key(config_entry.data)
+    saved = auth_store.get(key)
+    # The account gets its own connection pool, sized from the spas it had
+    # last time (one before the first login).
+    spanet = SpaNet(
+        base_url=config_entry.data.get(CONF_BASE_URL, BASE_URL),
+        pool_size=pool_size(
+            len(saved["spas"]) if saved else 1,
+            config_entry.options.get(OPT_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+        ),
+        ssl_context=get_default_context(),
+    )
+    spanet.on_session_update = lambda: auth_store.save(key, spanet.export_session())
+
+    try:
+        if saved:
+            try:
+                await spanet.resume(saved)
+                auth_store.save(key, spanet.export_session())
+                config_entry.async_create_background_task(
+                    hass, _async_refresh_spas(hass, config_entry, spanet), f"{DOMAIN} refresh spas"
+                )
+                return spanet
+            except SpaNetAuthFailed:
+                logger.info("Saved SpaNET session for %s was rejected, logging in again", config_entry.title)
+            except (SpaNetException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Don't fall back to a password login while the cloud is down
+                # or throttling; Home Assistant retries the setup later.
+                raise ConfigEntryNotReady(f"SpaNET unavailable: {e}") from e
+
+        await spanet.authenticate(
+            config_entry.data["email"],
+            config_entry.data["password"],
+            saved["device_id"] if saved else hass.data[DOMAIN][DEVICE_ID]
+        )
+    except BaseException:
+        await spanet.close()
+        raise
+    return spanet
+
+
+async def _async_refresh_spas(hass: HomeAssistant, config_entry: ConfigEntry, spanet: SpaNet) -> None:
+    """Check a resumed session's spa list against /Devices.
+
+    Setup uses the saved list so it doesn't wait on /Devices; spas added to or
+    removed from the account since are picked up by reloading the entry.
+    """
+    try:
+        changed = await spanet.refresh_spas()
+    except (SpaNetException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.debug("Couldn't refresh the SpaNET spa list for %s: %s", config_entry.title, e)
+        return
+    if changed:
+        logger.info("SpaNET spas for %s changed, reloading", config_entry.title)
+        hass.config_entries.async_schedule_reload(config_entry.entry_id)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
 ) -> bool:
     """Set up spanet from a config entry."""
 
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {"spas": []}
-    if DEVICE_ID not in hass.data[DOMAIN]:
-        hass.data[DOMAIN][DEVICE_ID] = str(uuid.uuid4())
+    # The config flow may already have created hass.data[DOMAIN] for the auth store.
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data.setdefault("accounts", {})
+    if DEVICE_ID not in domain_data:
+        domain_data[DEVICE_ID] = str(uuid.uuid4())
+
+    # This entry's coordinators by spa id, for its platforms.
+    config_entry.runtime_data = {}
 
-    session = aiohttp_client.async_get_clientsession(hass)
-    spanet = SpaNet(session)
-    hass.data[DOMAIN][config_entry.entry_id] = spanet
     if "email" not in config_entry.data or "password" not in config_entry.data:
+        hass.data[DOMAIN][config_entry.entry_id] = SpaNet(aiohttp_client.async_get_clientsession(hass))
         return True
 
-    await spanet.authenticate(
-        config_entry.data["email"],
-        config_entry.data["password"],
-        hass.data[DOMAIN][DEVICE_ID]
-    )
-    for spa in spanet.get_available_spas():
-        coordinator = Coordinator(hass, spanet, spa, config_entry)
-        # Await the first refresh to completion so coordinator.state (pumps,
-        # blower, etc.) is fully populated before the platforms set up their
-        # entities - otherwise entity creation can race the initial fetch and
-        # leave switches (e.g. the blower) orphaned/unavailable.
-        await coordinator.async_config_entry_first_refresh()
-
-        device_registry = dr.async_get(hass)
-        device = device_registry.async_get_or_create(
-            config_entry_id=config_entry.entry_id,
-            connections={(dr.CONNECTION_NETWORK_MAC, spa["macAddress"])},
-            identifiers={
-                (DOMAIN, spa["id"]),
-            },
-            name=spa["name"],
-        )
-        coordinator.device = device
+    # One authenticated SpaNet and one Coordinator per spa id for each account,
+    # reference-counted by the entries using them. The lock stops two entries
+    # set up in parallel from both logging in.
+    account = hass.data[DOMAIN]["accounts"].setdefault(account_key(config_entry.data), {
+        "lock": asyncio.Lock(),
+        "spanet": None,
+        "close_listener": None,
+        "coordinators": {},
+        "entries": set(),
+    })
+
+    # Registered before anything is awaited: an entry unloaded meanwhile
+    # (e.g. the other half of a reload) must not take the account down.
+    account["entries"].add(config_entry.entry_id)
+    try:
+        async with account["lock"]:
+            if account["spanet"] is None:
+                account["spanet"] = await async_login(hass, config_entry)
+                account["close_listener"] = hass.bus.async_listen_once(
+                    EVENT_HOMEASSISTANT_CLOSE, _async_close_listener(account)
+                )
+            spanet = account["spanet"]
+            hass.data[DOMAIN][config_entry.entry_id] = spanet
+
+            device_registry = dr.async_get(hass)
+            for spa in spanet.get_available_spas():
+                coordinator = account["coordinators"].get(spa["id"])
+                if coordinator is None:
+                    coordinator = Coordinator(hass, spanet, spa, config_entry)
+                    if await coordinator.async_restore():
+                        # Entities are built from the snapshot; only the endpoints
+                        # whose data has gone stale are fetched, in the background.
+                        config_entry.async_create_background_task(
+                            hass, coordinator.async_refresh(), f"{DOMAIN} refresh {spa['id']}"
+                        )
+                    else:
+                        # Await the first refresh to completion so coordinator.state (pumps,
+                        # blower, etc.) is fully populated before the platforms set up their
+                        # entities - otherwise entity creation can race the initial fetch and
+                        # leave switches (e.g. the blower) orphaned/unavailable.
+                        await coordinator.async_config_entry_first_refresh()
+                    account["coordinators"][spa["id"]] = coordinator
+                if coordinator.config_entry is config_entry:
+                    # Only the owning entry creates the spa's entities; the same
+                    # unique ids from a second entry would be rejected.
+                    config_entry.runtime_data[spa["id"]] = coordinator
 
-        hass.data[DOMAIN]["spas"].append(coordinator)
+                device = device_registry.async_get_or_create(
+                    config_entry_id=config_entry.entry_id,
+                    connections={(dr.CONNECTION_NETWORK_MAC, spa["macAddress"])},
+                    identifiers={
+                        (DOMAIN, spa["id"]),
+                    },
+                    name=spa["name"],
+                )
+                coordinator.device = device
+    except BaseException:
+        account["entries"].discard(config_entry.entry_id)
+        raise
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    # Every enabled entity has now subscribed to the keys it reads.
+    for coordinator in config_entry.runtime_data.values():
+        coordinator.track_subscribers = True
+        coordinator.suspend_unread()
+
     return True
 
 
@@ -67,16 +182,97 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry, cleaning up its platforms and coordinators.
 
     Previously this was a no-op, so the entry's platforms were never unloaded
-    and its coordinators were left in the shared ``spas`` list. Every reload
-    therefore stacked another set of coordinators that kept polling the SpaNet
-    cloud. Unload the platforms and drop this entry's coordinators/client.
+    and its coordinators kept running. Every reload therefore stacked another
+    set of coordinators that kept polling the SpaNet cloud. Unload the
+    platforms and shut down the coordinators this entry owns; the client is
+    only closed once no entry uses the account.
     """
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    if unload_ok:
-        hass.data[DOMAIN]["spas"] = [
-            coordinator
-            for coordinator in hass.data[DOMAIN]["spas"]
-            if coordinator.config_entry.entry_id != entry.entry_id
-        ]
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+    if not unload_ok:
+        return unload_ok
+
+    hass.data[DOMAIN].pop(entry.entry_id, None)
+    if "email" not in entry.data:
+        return unload_ok
+
+    accounts = hass.data[DOMAIN]["accounts"]
+    key = account_key(entry.data)
+    account = accounts.get(key)
+    if account is None:
+        return unload_ok
+
+    account["entries"].discard(entry.entry_id)
+    owned = {
+        spa_id: coordinator
+        for spa_id, coordinator in account["coordinators"].items()
+        if coordinator.config_entry is entry
+    }
+    for spa_id, coordinator in owned.items():
+        del account["coordinators"][spa_id]
+        await coordinator.async_shutdown()
+    if account["entries"]:
+        if owned:
+            hass.async_create_background_task(
+                _async_rehome(hass, entry, account, owned), f"{DOMAIN} rehome {entry.entry_id}"
+            )
+        return unload_ok
+
+    accounts.pop(key)
+    if account["close_listener"] is not None:
+        account["close_listener"]()
+    for coordinator in account["coordinators"].values():
+        await coordinator.async_shutdown()
+    await async_close_connections(account["spanet"])
     return unload_ok
+
+
+async def _async_rehome(hass: HomeAssistant, entry: ConfigEntry, account, spa_ids) -> None:
+    """Hand the spas an unloaded entry owned to another entry of the account.
+
+    A reload holds the entry's setup lock from unload until setup is done, and
+    the setup takes the spas back; otherwise reloading a remaining entry
+    creates their coordinators, owned by it, and their entities.
+    """
+    async with entry.setup_lock:
+        pass
+    if hass.data[DOMAIN]["accounts"].get(account_key(entry.data)) is not account:
+        return
+    if account["entries"] and any(spa_id not in account["coordinators"] for spa_id in spa_ids):
+        hass.config_entries.async_schedule_reload(next(iter(account["entries"])))
+
+
+def _async_close_listener(account):
+    """Close the account's connections when Home Assistant stops.
+
+    Entries aren't unloaded on shutdown, so without this the account's own
+    aiohttp session would be left open.
+    """
+
+    async def async_close(event: Event) -> None:
+        account["close_listener"] = None
+        await async_close_connections(account["spanet"])
+
+    return async_close
+
+
+async def async_close_connections(spanet: SpaNet) -> None:
+    for connection in spanet.spa_sockets.values():
+        await connection.close()
+    await spanet.close()
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the saved session and spa snapshots once no entry logs in to the account."""
+    if "email" not in entry.data:
+        return
+    key = account_key(entry.data)
+    if any(
+        other.entry_id != entry.entry_id and "email" in other.data and account_key(other.data) == key
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        return
+    auth_store = await async_get_auth_store(hass)
+    saved = auth_store.get(key)
+    for spa in saved["spas"] if saved else ():
+        await snapshot_store(hass, spa["id"]).async_remove()
+    auth_store.remove(key)
@@ -25,7 +25,7 @@ async def async_setup_entry(
 ) -> bool:
     entities = []
 
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
         entities += [
             SpaClimate(coordinator),
         ]
@@ -35,7 +35,7 @@ async def async_setup_entry(
 
 class SpaClimate(SpaEntity, ClimateEntity):
     def __init__(self, coordinator) -> None:
-        super().__init__(coordinator, "climate", "Climate")
+        super().__init__(coordinator, "climate", "Climate", (SK_HEATER, SK_WATERTEMP, SK_SETTEMP))
         self.hass = coordinator.hass
 
         self._attr_temperature_unit = UnitOfTemperature.CELSIUS
@@ -46,22 +46,28 @@ class SpaClimate(SpaEntity, ClimateEntity):
         self._attr_max_temp = 41.0
         self._attr_min_temp = 5
         self._attr_name = coordinator.spa_name
+        self._heater = coordinator.accessor(SK_HEATER)
+        self._water_temperature = coordinator.accessor(SK_WATERTEMP)
+        self._set_temperature = coordinator.accessor(SK_SETTEMP)
 
     @property
     def hvac_action(self) -> HVACAction | str | None:
-        status = self.coordinator.get_state_numeric(SK_HEATER)
+        status = self._heater()
         if status is None:
             return None
-        return HVACAction.HEATING if status == 1 else HVACAction.IDLE
+        return HVACAction.HEATING if int(status) == 1 else HVACAction.IDLE
 
     @property
     def current_temperature(self) -> float | None:
-        return self.coordinator.get_state_numeric(SK_WATERTEMP, divisor=10)
+        value = self._water_temperature()
+        return None if value is None else int(value) / 10
 
     @property
     def target_temperature(self) -> float | None:
-        return self.coordinator.get_state_numeric(SK_SETTEMP, divisor=10)
+        value = self._set_temperature()
+        return None if value is None else int(value) / 10
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new target temperature."""
-        await self.coordinator.set_temperature(int(kwargs["temperature"] * 10))
+        async with self.coordinator.command_batch():
+            await self.coordinator.set_temperature(int(kwargs["temperature"] * 10))
@@ -0,0 +1,23 @@
+"""JSON encoding for the SpaNET API client.
+
+Uses orjson when it's installed (it ships with Home Assistant) and the stdlib
+json module otherwise. Both parse straight from the response bytes, so bodies
+aren't decoded to str first the way aiohttp's response.json() does.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+    loads = orjson.loads
+    dumps = orjson.dumps
+else:
+    BACKEND = "json"
+    loads = json.loads
+
+    def dumps(value) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
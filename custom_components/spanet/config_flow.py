@@ -12,10 +12,31 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import aiohttp_client
 
-from .spanet import SpaNet, SpaNetAuthFailed
-from .const import DOMAIN
+from .spanet import SpaNet, SpaNetAuthFailed, BASE_URL
+from .storage import account_key, async_get_auth_store
+from .trace import Tracer
+from .const import (
+    DOMAIN,
+    CONF_BASE_URL,
+    OPT_ADAPTIVE_POLLING,
+    OPT_LOCAL_HOSTS,
+    OPT_LAZY_SETTINGS,
+    OPT_HEATER_KW,
+    OPT_PUMP_KW,
+    OPT_BLOWER_KW,
+    OPT_FILTRATION_KW,
+    DEFAULT_HEATER_KW,
+    DEFAULT_PUMP_KW,
+    DEFAULT_BLOWER_KW,
+    DEFAULT_FILTRATION_KW,
+    MAX_RATING_KW,
+    OPT_MAX_CONCURRENT,
+    DEFAULT_MAX_CONCURRENT,
+    MAX_CONCURRENT_LIMIT,
+)
 
 _LOGGER = logging.getLogger(__name__)
+auth_trace = Tracer("auth")
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for spanet."""
@@ -33,10 +54,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
+        schema = ConfigFlow.STEP_USER_DATA_SCHEMA
+        if self.show_advanced_options:
+            # Lets developers point the integration at tools/spanet_simulator.py.
+            schema = schema.extend({vol.Optional(CONF_BASE_URL, default=BASE_URL): str})
+
         if user_input is None:
-            return self.async_show_form(
-                step_id="user", data_schema=ConfigFlow.STEP_USER_DATA_SCHEMA
-            )
+            return self.async_show_form(step_id="user", data_schema=schema)
 
         errors = {}
 
@@ -51,7 +75,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_create_entry(title=info["title"], data=user_input)
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="user", data_schema=schema, errors=errors
         )
 
     @staticmethod
@@ -62,13 +86,17 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         session = aiohttp_client.async_get_clientsession(hass)
-        spanet = SpaNet(session)
-        _LOGGER.debug(f"Validate - {data['email']} {data['password']}")
+        spanet = SpaNet(session, data.get(CONF_BASE_URL, BASE_URL))
+        auth_trace.debug("validate", email=data["email"], password=data["password"])
         try:
             await spanet.authenticate(data["email"], data["password"], str(uuid.uuid4()))
         except Exception as e:
             _LOGGER.info(e)
             raise
+
+        # Keep the session so setting up the entry doesn't log in a second time.
+        auth_store = await async_get_auth_store(hass)
+        auth_store.save(account_key(data), spanet.export_session())
         return {"title": "SpaNET"}
 
     @staticmethod
@@ -84,6 +112,24 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     SETTINGS_SCHEMA=vol.Schema(
         {
             vol.Required("enable_heat_pump", default=False): bool,
+            vol.Required(OPT_ADAPTIVE_POLLING, default=True): bool,
+            vol.Required(OPT_LAZY_SETTINGS, default=False): bool,
+            vol.Required(OPT_MAX_CONCURRENT, default=DEFAULT_MAX_CONCURRENT): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=MAX_CONCURRENT_LIMIT)
+            ),
+            vol.Optional(OPT_LOCAL_HOSTS, default=""): str,
+            vol.Required(OPT_HEATER_KW, default=DEFAULT_HEATER_KW): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=MAX_RATING_KW)
+            ),
+            vol.Required(OPT_PUMP_KW, default=DEFAULT_PUMP_KW): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=MAX_RATING_KW)
+            ),
+            vol.Required(OPT_BLOWER_KW, default=DEFAULT_BLOWER_KW): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=MAX_RATING_KW)
+            ),
+            vol.Required(OPT_FILTRATION_KW, default=DEFAULT_FILTRATION_KW): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=MAX_RATING_KW)
+            ),
         }
     )
 
@@ -2,6 +2,10 @@
 
 DOMAIN = "spanet"
 DEVICE_ID = "device_id"
+# Optional API root, e.g. the local simulator in tools/ (advanced mode only).
+CONF_BASE_URL = "base_url"
+# LAN addresses of spa WiFi modules: "spa_id=host[:port]", comma separated.
+OPT_LOCAL_HOSTS = "local_hosts"
 
 SK_SETTEMP = "setTemperature"
 SK_WATERTEMP = "currentTemperature"
@@ -23,6 +27,16 @@ SL_SLEEPING = "Sleeping"
 SL_SANITISE = "Sanitise"
 SL_FILTERING = "Filtering"
 
+# Tasks to refetch when a status appears in or drops out of the dashboard
+# statusList. Heating is fully described by the dashboard itself; a status not
+# listed here refreshes every task.
+STATUS_TASKS = {
+    SL_HEATING: (),
+    SL_FILTERING: ("update_pumps", "update_filtration"),
+    SL_SANITISE: ("update_pumps",),
+    SL_SLEEPING: ("update_information",),
+}
+
 # Keys within the dashboard "statusFlags" object
 SF_SANITISE = "SanitiseOn"
 SF_FILTERING = "Filtering"
@@ -82,3 +96,73 @@ LIGHT_COLOURS = {
 LIGHT_MODES = ["colour", "fade", "step", "party"]
 LIGHT_LEVEL_MIN = 1
 LIGHT_LEVEL_MAX = 5
+
+# Adaptive polling: the scheduler runs each task on a shorter interval while the
+# spa is busy (heating, sanitising, pumps running, recent command) and a longer
+# one once it has been idle at its set point for a while.
+OPT_ADAPTIVE_POLLING = "adaptive_polling"
+PHASE_ACTIVE = "active"
+PHASE_NORMAL = "normal"
+PHASE_IDLE = "idle"
+ADAPTIVE_COMMAND_WINDOW = 300
+ADAPTIVE_IDLE_AFTER = 3 * 3600
+ADAPTIVE_SETPOINT_TOLERANCE = 5  # tenths of a degree
+
+# Maximum number of scheduler tasks (endpoint fetches) in flight per spa.
+OPT_MAX_CONCURRENT = "max_concurrent_requests"
+DEFAULT_MAX_CONCURRENT = 3
+MAX_CONCURRENT_LIMIT = 6
+
+# How long an optimistic command value masks polled values before the cloud's
+# value is accepted, in seconds.
+COMMAND_CONFIRM_WINDOW = 120
+
+# Power ratings (kW) used to estimate energy from heater/pump/blower on-time.
+OPT_HEATER_KW = "heater_kw"
+OPT_PUMP_KW = "pump_kw"
+OPT_BLOWER_KW = "blower_kw"
+OPT_FILTRATION_KW = "filtration_kw"
+DEFAULT_HEATER_KW = 3.0
+DEFAULT_PUMP_KW = 1.5
+DEFAULT_BLOWER_KW = 0.7
+DEFAULT_FILTRATION_KW = 0.2
+MAX_RATING_KW = 20
+
+# On-demand settings: the settings endpoints aren't polled; a key older than its
+# task's normal interval is fetched the first time something reads it. A daily
+# poll still catches changes made on the spa while nothing was reading.
+OPT_LAZY_SETTINGS = "lazy_settings"
+LAZY_MAX_AGE = 24 * 3600
+# Top-level state key -> the task that fetches it.
+KEY_SOURCES = {
+    SK_OPERATION_MODE: "update_information",
+    SK_POWER_SAVE: "update_information",
+    SK_HEAT_PUMP: "update_information",
+    SK_ELEMENT_BOOST: "update_information",
+    SK_SLEEP_TIMERS: "update_information",
+    SK_LIGHTS: "update_lights",
+    SK_FILT_RUNTIME: "update_filtration",
+    SK_FILT_INTERVAL: "update_filtration",
+    SK_TIMEOUT: "update_settings",
+    SK_LOCK: "update_settings",
+    SK_SANITISE_TIME: "update_settings",
+}
+# The SpaPool endpoint each polling task fetches.
+TASK_ENDPOINTS = {
+    "update_dashboard": "get_dashboard",
+    "update_pumps": "get_pumps",
+    "update_information": "get_information",
+    "update_lights": "get_light_details",
+    "update_filtration": "get_filtration",
+    "update_settings": "get_settings_details",
+}
+# Where a command's keys are read back from to confirm it: the settings keys
+# above, pumps and blower from the pumps endpoint, the rest from the dashboard.
+COMMAND_SOURCES = {**KEY_SOURCES, SK_PUMPS: "update_pumps", SK_BLOWER: "update_pumps"}
+
+# Staggering: each spa ticks at its own offset within UPDATE_INTERVAL, derived
+# from its id so it's stable across restarts, and each task runs in its own slot
+# within its period. Jitter (seconds) spreads what still lines up.
+UPDATE_INTERVAL = 60
+TICK_JITTER = 5
+TASK_JITTER = 2
@@ -1,15 +1,50 @@
+import asyncio
 import logging
-from datetime import timedelta
-import async_timeout
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from homeassistant.components.recorder.models import StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfTemperature
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import TemperatureConverter
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from .const import *
-from .spanet import SpaNetApiError
-from .scheduler import Scheduler
+from .spanet import SpaNetApiError, UNCHANGED
+from .scheduler import Scheduler, next_slot, slot_offset
+from .journal import CommandJournal, MISSING
+from .history import TemperatureHistory, HOUR
+from .duty import DutyCycles
+from .local import async_get_spa, parse_local_hosts
+from .trace import Tracer
+from .storage import snapshot_store, SNAPSHOT_SAVE_DELAY
+from .state import (
+    SpaState,
+    PumpState,
+    BlowerState,
+    LightState,
+    SleepTimerState,
+    compile_accessor,
+    flatten,
+)
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:
+    # Before 2025.4 statistics declared has_mean instead of a mean_type.
+    StatisticMeanType = None
+# Newer cores want the unit class alongside the unit; older ones reject it.
+STATISTICS_UNIT_CLASS = "unit_class" in StatisticMetaData.__annotations__
 
 logger = logging.getLogger(__name__)
+command_trace = Tracer("command")
+poll_trace = Tracer("poll")
+payload_trace = Tracer("payload")
 
 class Coordinator(DataUpdateCoordinator):
     """My custom coordinator."""
@@ -20,24 +55,117 @@ class Coordinator(DataUpdateCoordinator):
             hass,
             logger,
             name=spa_config["name"],
-            update_interval=timedelta(seconds=60),
+            update_interval=timedelta(seconds=UPDATE_INTERVAL),
+            # Listeners are only notified when the revision returned by
+            # _async_update_data moves, i.e. when a payload actually changed.
+            always_update=False,
+            # Not tied to the entry's unload: coordinators are shared by the
+            # entries of an account and shut down in async_unload_entry.
+            config_entry=None,
         )
         self.spanet = spanet
         self.spa_config = spa_config
         self.config_entry = config_entry
-        self.state = {}
+        self.state = SpaState()
+        self._accessors = {}
+        self.revision = 0
+        # Bumped when a poll moves what entities read outside self.state: the
+        # duty counters, and the request metrics while a sensor shows them.
+        self.activity = 0
+        self.metrics_watchers = 0
+        # State keys changed by the last update; None means notify everything.
+        self.dirty = None
         self.spa = None
-
-        self.scheduler = Scheduler()
+        self._batch = None
+        self.journal = CommandJournal(COMMAND_CONFIRM_WINDOW)
+        # Endpoint name -> when its last parsed payload was fetched.
+        self.parsed = {}
+        self.last_command = 0
+        self.status_changed = time.time()
+        self.snapshot = snapshot_store(hass, spa_config["id"])
+        self.history = TemperatureHistory()
+        self.duty = DutyCycles()
+        # Hourly statistics are imported for whole hours after startup only.
+        self.statistics_until = (time.time() // HOUR + 1) * HOUR
+
+        # This spa's slot within each interval, so a fleet of spas doesn't poll
+        # in lockstep.
+        self.offset = slot_offset(spa_config["id"])
+        self.scheduler = Scheduler(
+            max_concurrent=config_entry.options.get(OPT_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+            offset=self.offset,
+            on_error=self._task_failed,
+        )
 
         self.tasks = [
-            self.scheduler.add_task(120, self.update_dashboard),
-            self.scheduler.add_task(300, self.update_pumps),
-            self.scheduler.add_task(1200, self.update_information),
-            self.scheduler.add_task(1200, self.update_lights),
-            self.scheduler.add_task(1200, self.update_filtration),
-            self.scheduler.add_task(1200, self.update_settings)
+            self.scheduler.add_task(120, self.update_dashboard, active_interval=60, idle_interval=600),
+            self.scheduler.add_task(300, self.update_pumps, active_interval=120, idle_interval=900),
+            self.scheduler.add_task(1200, self.update_information, idle_interval=3600),
+            self.scheduler.add_task(1200, self.update_lights, idle_interval=3600),
+            self.scheduler.add_task(1200, self.update_filtration, idle_interval=3600),
+            self.scheduler.add_task(1200, self.update_settings, idle_interval=3600)
         ]
+        # Task name -> task, for the settings endpoints fetched on demand.
+        self.on_demand = {}
+        if config_entry.options.get(OPT_LAZY_SETTINGS, False):
+            for task in self.tasks[2:]:
+                task.on_demand = True
+                self.on_demand[task.callback.__name__] = task
+        self._fetches = {}
+        # Task name -> number of added entities reading keys it fetches. Tasks
+        # nothing reads are suspended once the platforms have set up.
+        self.subscribers = Counter()
+        self.track_subscribers = False
+
+    async def async_restore(self):
+        """Warm-start from the last saved snapshot.
+
+        Returns False if there's nothing saved. Otherwise the state is restored
+        so entities can be built straight away, and each task is rescheduled
+        from its last successful run, so only endpoints whose data has gone
+        stale are fetched on the first tick.
+        """
+        data = await self.snapshot.async_load()
+        if not data or not data.get("state"):
+            return False
+
+        self.spa = await async_get_spa(self.spanet, self.spa_id, self.local_address())
+        self.state = SpaState.from_dict(data["state"])
+        self.status_changed = data.get("status_changed", self.status_changed)
+        self.duty = DutyCycles.from_dict(data.get("duty", {}))
+        last_ticks = data.get("tasks", {})
+        for task in self.tasks:
+            last_tick = last_ticks.get(task.callback.__name__)
+            if last_tick:
+                task.last_tick = last_tick
+                task.next_tick = task.next_after(last_tick, self.scheduler.phase)
+        self.scheduler.set_phase(self.poll_phase())
+        return True
+
+    def local_address(self):
+        hosts = parse_local_hosts(
+            self.config_entry.options.get(OPT_LOCAL_HOSTS),
+            [spa["id"] for spa in self.spanet.get_available_spas()],
+        )
+        return hosts.get(self.spa_id)
+
+    async def async_shutdown(self):
+        await super().async_shutdown()
+        # A coordinator re-created for another entry warm-starts from this.
+        if self.spa:
+            await self.snapshot.async_save(self._snapshot_data())
+
+    def _snapshot_data(self):
+        return {
+            "state": self.state.as_dict(),
+            "status_changed": self.status_changed,
+            "duty": self.duty.as_dict(),
+            "tasks": {
+                task.callback.__name__: task.last_tick
+                for task in self.tasks
+                if task.last_tick
+            },
+        }
 
     @property
     def spa_name(self):
@@ -47,22 +175,236 @@ class Coordinator(DataUpdateCoordinator):
     def spa_id(self):
         return self.spa_config["id"]
 
-    def queue_refresh(self):
-        self.tasks[0].trigger(20)
+    def queue_refresh(self, keys):
+        """Poll the dashboard, and the endpoints that return keys, shortly."""
+        names = {"update_dashboard"}
+        names.update(self.source_task(key) for key in keys)
+        for task in self.tasks:
+            if task.callback.__name__ in names:
+                task.trigger(20)
+
+    def source_task(self, key):
+        """The polling task whose endpoint a command's key is read back from."""
+        return COMMAND_SOURCES.get(key.split(".")[0], "update_dashboard")
+
+    def fetched_at(self, key):
+        """When the payload key is read from was last fetched and parsed."""
+        return self.parsed.get(TASK_ENDPOINTS[self.source_task(key)], 0)
+
+    def _confirm_expired(self, key):
+        # Unconfirmed: parse the endpoint next poll, even if its body is the
+        # one already seen.
+        self.spa.invalidate(TASK_ENDPOINTS[self.source_task(key)])
+
+    def reconcile(self):
+        if self.journal.reconcile(self.read_state, self.set_state, self.fetched_at, self._confirm_expired):
+            self.revision += 1
+
+    def poll_phase(self):
+        """Classify the spa as active, idle or normal for adaptive polling."""
+        if not self.config_entry.options.get(OPT_ADAPTIVE_POLLING, True):
+            return PHASE_NORMAL
+
+        now = time.time()
+        if now - self.last_command < ADAPTIVE_COMMAND_WINDOW:
+            return PHASE_ACTIVE
+
+        status_list = self.state.get("statusList", [])
+        if SL_HEATING in status_list or SL_SANITISE in status_list or self.state.get(SK_SANITISE):
+            return PHASE_ACTIVE
+
+        if any(p.get("state") == "on" for p in self.state.get(SK_PUMPS, {}).values()):
+            return PHASE_ACTIVE
+
+        blower = self.state.get(SK_BLOWER)
+        if blower and blower.status != BLOWER_STATUS_OFF:
+            return PHASE_ACTIVE
+
+        water = self.state.get(SK_WATERTEMP)
+        target = self.state.get(SK_SETTEMP)
+        if (
+            water is not None
+            and target is not None
+            and abs(int(water) - int(target)) <= ADAPTIVE_SETPOINT_TOLERANCE
+            and now - self.status_changed >= ADAPTIVE_IDLE_AFTER
+        ):
+            return PHASE_IDLE
+
+        return PHASE_NORMAL
+
+    def is_dirty(self, keys):
+        """Whether the last update touched any of keys (or anything under them)."""
+        if keys is None or self.dirty is None:
+            return True
+        for key in keys:
+            for changed in self.dirty:
+                if changed == key or changed.startswith(key + ".") or key.startswith(changed + "."):
+                    return True
+        return False
+
+    def _notify(self, keys):
+        self.dirty = set(keys)
+        self.async_update_listeners()
+
+    def _command_sent(self, commands):
+        keys = [key for changes, request, args, queue in commands for key in changes]
+        self.last_command = time.time()
+        self.scheduler.set_phase(self.poll_phase())
+        # The optimistic value has to be checked against the cloud, so the next
+        # poll of each endpoint must be parsed even if the body looks the same.
+        # There's no eager refresh: the journal masks stale polls until the
+        # next scheduled (or queued) fetch confirms the write.
+        self.spa.invalidate()
+        self.revision += 1
+        self._notify(keys)
+        queued = [key for changes, request, args, queue in commands if queue for key in changes]
+        if queued:
+            self.queue_refresh(queued)
+        for task in self.on_demand_tasks(keys):
+            self.fetch_on_demand(task, 20)
+
+    def compiled(self, key: str):
+        read = self._accessors.get(key)
+        if read is None:
+            read = self._accessors[key] = compile_accessor(key)
+        return read
+
+    def accessor(self, key: str, sub_key=None):
+        """Resolve a state key once, for an entity to read on every state write.
+
+        The returned callable gives None while the value is missing.
+        """
+        read = compile_accessor(key if sub_key is None else f"{key}.{sub_key}")
+
+        def get():
+            try:
+                return read(self.state)
+            except (AttributeError, KeyError):
+                return None
+
+        return get
+
+    def subscribe(self, keys):
+        """Register an entity reading keys; returns the call to unregister it."""
+        names = {KEY_SOURCES.get(key.split(".", 1)[0]) for key in keys or ()} - {None}
+        self.subscribers.update(names)
+
+        def unsubscribe():
+            self.subscribers.subtract(names)
+            self.suspend_unread()
+
+        self.suspend_unread()
+        return unsubscribe
+
+    def watch_metrics(self):
+        """Register an enabled metrics sensor; returns the call to unregister it.
+
+        Metrics sensors are disabled by default, and without one a poll that
+        only moved the metrics doesn't notify listeners.
+        """
+        self.metrics_watchers += 1
+
+        def unwatch():
+            self.metrics_watchers -= 1
+
+        return unwatch
+
+    def suspend_unread(self):
+        """Suspend the tasks whose data no enabled entity reads, resume the rest."""
+        if not self.track_subscribers:
+            return
+        for task in self.tasks:
+            name = task.callback.__name__
+            if name not in KEY_SOURCES.values():
+                continue
+            suspended = self.subscribers[name] <= 0
+            if suspended != task.suspended:
+                logger.debug("%s task %s for %s", "Suspending" if suspended else "Resuming", name, self.spa_name)
+                task.suspended = suspended
+
+    def on_demand_tasks(self, keys):
+        """The on-demand tasks fetching any of keys."""
+        return {
+            task for task in (self.on_demand.get(KEY_SOURCES.get(key.split(".", 1)[0])) for key in keys or ())
+            if task is not None
+        }
+
+    def fetch_on_demand(self, task, delay=0):
+        """Fetch an on-demand task in the background, after delay seconds.
+
+        Only what needs the spa's current settings asks for this: a command
+        (to confirm it) and an explicit update of an entity. Requests share a
+        single fetch, and listeners are notified when it changes anything.
+        """
+        fetch = self._fetches.get(task)
+        if fetch is None:
+            fetch = self._fetches[task] = self.config_entry.async_create_background_task(
+                self.hass,
+                self._fetch_on_demand(task, delay),
+                f"{DOMAIN} {self.spa_id} {task.callback.__name__}",
+            )
+        return fetch
+
+    async def async_fetch_keys(self, keys):
+        """Fetch the on-demand endpoints behind keys now, and wait for them."""
+        fetches = [self.fetch_on_demand(task) for task in self.on_demand_tasks(keys)]
+        if fetches:
+            await asyncio.gather(*fetches)
+
+    async def _fetch_on_demand(self, task, delay):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            if not self.spa:
+                return
+            revision = self.revision
+            before = flatten(self.state)
+            await self.scheduler.run(task, int(time.time()))
+            poll_trace.debug("on_demand", spa=self.spa_id, task=task.callback.__name__, changed=self.revision != revision)
+            if self.revision == revision:
+                return
+            self.reconcile()
+            self.snapshot.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+            self._notify(self._changed_since(before))
+        finally:
+            del self._fetches[task]
+
+    def _changed_since(self, before):
+        after = flatten(self.state)
+        return {
+            key for key in before.keys() | after.keys()
+            if before.get(key, MISSING) != after.get(key, MISSING)
+        }
 
     def get_state(self, key: str, sub_key=None):
-        obj = self.state
-        path = key.split('.')
         if sub_key is not None:
-            path.append(sub_key)
+            key = f"{key}.{sub_key}"
         try:
-            for p in path:
-                obj = obj[p]
-            return obj
-        except (KeyError, IndexError) as exc:
-            logger.error("Failed to load data for status key %s", key, exc_info=exc)
-            logger.error("Status: %s", self.state)
-            raise
+            return self.compiled(key)(self.state)
+        except (AttributeError, KeyError) as exc:
+            logger.debug("No data for status key %s", key)
+            raise KeyError(key) from exc
+
+    def set_state(self, key: str, value):
+        parent, _, leaf = key.rpartition('.')
+        obj = self.get_state(parent) if parent else self.state
+        obj[leaf] = value
+
+    def read_state(self, key: str):
+        """Like get_state, but MISSING instead of raising for an absent key."""
+        try:
+            return self.compiled(key)(self.state)
+        except (AttributeError, KeyError):
+            return MISSING
+
+    def restore_state(self, key: str, value):
+        if value is not MISSING:
+            self.set_state(key, value)
+            return
+        parent, _, leaf = key.rpartition('.')
+        obj = self.read_state(parent) if parent else self.state
+        if obj is not MISSING:
+            obj.pop(leaf, None)
 
     def get_state_numeric(self, key: str, divisor=1):
         value = self.get_state(key)
@@ -70,154 +412,155 @@ class Coordinator(DataUpdateCoordinator):
             return None
         return int(value) / divisor
 
+    @asynccontextmanager
+    async def command_batch(self):
+        """Group several set_* calls into one transaction.
+
+        The optimistic state changes apply straight away, but the PUTs are held
+        until the block exits and then sent in submission order (a later write
+        to the same state keys replaces the earlier one in place), followed by a
+        single state write and refresh.
+        """
+        if self._batch is not None:
+            yield
+            return
+
+        self._batch = {}
+        try:
+            yield
+        except Exception:
+            self._rollback(self._batch.values())
+            raise
+        finally:
+            commands = list(self._batch.values())
+            self._batch = None
+        await self._send(commands)
+
+    async def _command(self, changes: dict, request, *args, queue=False):
+        for key, value in changes.items():
+            self.journal.record(key, value, self.read_state(key))
+            self.set_state(key, value)
+
+        command_trace.debug(
+            request.__name__, spa=self.spa_id, changes=changes, args=args,
+            batched=self._batch is not None, state=self.state,
+        )
+        command = (changes, request, args, queue)
+        if self._batch is not None:
+            self._batch[tuple(changes)] = command
+            return
+        await self._send([command])
+
+    async def _send(self, commands):
+        if not commands:
+            return
+        for index, (changes, request, args, queue) in enumerate(commands):
+            try:
+                await request(*args)
+            except Exception:
+                # The PUTs before the failed one reached the spa and still need
+                # confirming; everything from the failed PUT onwards never did.
+                if index:
+                    self._command_sent(commands[:index])
+                self._rollback(commands[index:])
+                raise
+        self._command_sent(commands)
+
+    def _rollback(self, commands):
+        keys = []
+        for changes, request, args, queue in commands:
+            for key, previous in self.journal.rollback(changes).items():
+                self.restore_state(key, previous)
+                keys.append(key)
+        self.spa.invalidate()
+        self.revision += 1
+        self._notify(keys)
+
     async def set_temperature(self, temp: int):
-        self.state[SK_SETTEMP] = temp
-        await self.spa.set_temperature(temp)
-        logger.debug(f"SET TEMP: {temp} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        await self._command({SK_SETTEMP: temp}, self.spa.set_temperature, temp, queue=True)
 
     async def set_pump(self, key: str, state: str):
         pump = self.get_state(f"{SK_PUMPS}.{key}")
-        pump["state"] = state
-        await self.spa.set_pump(pump["apiId"], state)
-        logger.debug(f"SET PUMP {key}: {state} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        await self._command({f"{SK_PUMPS}.{key}.state": state}, self.spa.set_pump, pump.apiId, state, queue=True)
 
     async def set_lights(self, state: str):
-        lights = self.get_state(f"{SK_LIGHTS}")
-        lights["state"] = state
-        await self.spa.set_light_status(lights["apiId"], 1 if state == "on" else 0)
-        logger.debug(f"SET LIGHTS: {state} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        lights = self.get_state(SK_LIGHTS)
+        await self._command({f"{SK_LIGHTS}.state": state}, self.spa.set_light_status, lights.apiId, 1 if state == "on" else 0, queue=True)
 
     async def set_light_brightness(self, level: int):
         lights = self.get_state(SK_LIGHTS)
-        lights["brightness"] = level
-        await self.spa.set_light_brightness(lights["apiId"], level)
-        logger.debug(f"SET LIGHT BRIGHTNESS: {level} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        await self._command({f"{SK_LIGHTS}.brightness": level}, self.spa.set_light_brightness, lights.apiId, level, queue=True)
 
     async def set_light_colour(self, colour: str):
         lights = self.get_state(SK_LIGHTS)
-        lights["colour"] = colour
-        await self.spa.set_light_colour(lights["apiId"], colour)
-        logger.debug(f"SET LIGHT COLOUR: {colour} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        await self._command({f"{SK_LIGHTS}.colour": colour}, self.spa.set_light_colour, lights.apiId, colour, queue=True)
 
     async def set_light_mode(self, mode: str):
         lights = self.get_state(SK_LIGHTS)
-        lights["mode"] = mode
-        await self.spa.set_light_mode(lights["apiId"], mode)
-        logger.debug(f"SET LIGHT MODE: {mode} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        await self._command({f"{SK_LIGHTS}.mode": mode}, self.spa.set_light_mode, lights.apiId, mode, queue=True)
 
     async def set_light_speed(self, speed: int):
         lights = self.get_state(SK_LIGHTS)
-        lights["speed"] = speed
-        await self.spa.set_light_speed(lights["apiId"], speed)
-        logger.debug(f"SET LIGHT SPEED: {speed} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        await self._command({f"{SK_LIGHTS}.speed": speed}, self.spa.set_light_speed, lights.apiId, speed, queue=True)
 
     async def set_operation_mode(self, mode: str):
         modeIndex = OPERATION_MODES.index(mode)
         if modeIndex < 0:
-            logger.error(f"Unknown operation mode: {mode}")
+            logger.error("Unknown operation mode: %s", mode)
             return
 
-        await self.spa.set_operation_mode(modeIndex)
-        self.state[SK_OPERATION_MODE] = mode
-        logger.debug(f"SET OPERATION MODE: {mode} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_OPERATION_MODE: mode}, self.spa.set_operation_mode, modeIndex)
 
     async def set_power_save(self, mode: str):
         modeIndex = POWER_SAVE.index(mode)
         if modeIndex < 0:
-            logger.error(f"Unknown power save: {mode}")
+            logger.error("Unknown power save: %s", mode)
             return
 
-        await self.spa.set_power_save(modeIndex)
-        self.state[SK_POWER_SAVE] = mode
-        logger.debug(f"SET POWER SAVE: {mode} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_POWER_SAVE: mode}, self.spa.set_power_save, modeIndex)
 
     async def set_sleep_timer(self, key: str, value: str):
         timer = self.get_state(f"{SK_SLEEP_TIMERS}.{key}")
-        timer["state"] = value
-        await self.spa.set_sleep_timer(timer["apiId"], timer['number'], value == "on")
-        logger.debug(f"SET SLEEP TIMER {key}: {value} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({f"{SK_SLEEP_TIMERS}.{key}.state": value}, self.spa.set_sleep_timer, timer.apiId, timer.number, value == "on")
 
     async def set_heat_pump(self, mode: str):
         modeIndex = HEAT_PUMP.index(mode)
         if modeIndex < 0:
-            logger.error(f"Unknown heat pump: {mode}")
+            logger.error("Unknown heat pump: %s", mode)
             return
 
-        await self.spa.set_heat_pump(modeIndex)
-        self.state[SK_HEAT_PUMP] = mode
-        logger.debug(f"SET HEAT PUMP: {mode} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_HEAT_PUMP: mode}, self.spa.set_heat_pump, modeIndex)
 
     async def set_element_boost(self, value: str):
-        await self.spa.set_element_boost(1 if value == "on" else 0)
-        self.state[SK_ELEMENT_BOOST] = value
-        logger.debug(f"SET ELEMENT BOOST: {value} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_ELEMENT_BOOST: value}, self.spa.set_element_boost, 1 if value == "on" else 0)
 
     async def set_blower_mode(self, mode_id: int, speed: int = 0):
         # modeId: 1 = off, 2 = variable (speed 1-5), 3 = ramp.
         blower = self.get_state(SK_BLOWER)
-        await self.spa.set_blower(blower["apiId"], mode_id, speed)
-        blower["status"] = BLOWER_MODE_TO_STATUS.get(mode_id, blower.get("status"))
-        if mode_id == BLOWER_MODE_VARIABLE and speed:
-            blower["speed"] = speed
-        logger.debug(f"SET BLOWER: mode={mode_id} speed={speed} -> {self.state}")
-        await self.async_request_refresh()
-        self.queue_refresh()
+        changes = {
+            f"{SK_BLOWER}.status": BLOWER_MODE_TO_STATUS.get(mode_id, blower.status),
+            f"{SK_BLOWER}.speed": speed if mode_id == BLOWER_MODE_VARIABLE and speed else blower.speed,
+        }
+        await self._command(changes, self.spa.set_blower, blower.apiId, mode_id, speed, queue=True)
 
     async def set_sanitise(self, value: str):
         on = value == "on"
-        await self.spa.set_sanitise(on)
-        self.state[SK_SANITISE] = 1 if on else 0
-        logger.debug(f"SET SANITISE: {value} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_SANITISE: 1 if on else 0}, self.spa.set_sanitise, on)
 
     async def set_filtration_runtime(self, value: int):
-        self.state[SK_FILT_RUNTIME] = int(value)
-        await self.spa.set_filtration("totalRuntime", int(value))
-        logger.debug(f"SET FILTRATION RUNTIME: {value} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_FILT_RUNTIME: int(value)}, self.spa.set_filtration, "totalRuntime", int(value))
 
     async def set_filtration_interval(self, value: str):
-        self.state[SK_FILT_INTERVAL] = str(value)
-        await self.spa.set_filtration("inBetweenCycles", int(value))
-        logger.debug(f"SET FILTRATION INTERVAL: {value} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_FILT_INTERVAL: str(value)}, self.spa.set_filtration, "inBetweenCycles", int(value))
 
     async def set_timeout(self, value: int):
-        self.state[SK_TIMEOUT] = int(value)
-        await self.spa.set_timeout(int(value))
-        logger.debug(f"SET TIMEOUT: {value} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_TIMEOUT: int(value)}, self.spa.set_timeout, int(value))
 
     async def set_lock(self, mode: str):
-        self.state[SK_LOCK] = mode
-        await self.spa.set_lock(LOCK_MODES.index(mode) + 1)
-        logger.debug(f"SET LOCK: {mode} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_LOCK: mode}, self.spa.set_lock, LOCK_MODES.index(mode) + 1)
 
     async def set_sanitise_time(self, time_str: str):
-        self.state[SK_SANITISE_TIME] = time_str
-        await self.spa.set_sanitise_time(time_str)
-        logger.debug(f"SET SANITISE TIME: {time_str} -> {self.state}")
-        await self.async_request_refresh()
+        await self._command({SK_SANITISE_TIME: time_str}, self.spa.set_sanitise_time, time_str)
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
@@ -225,23 +568,82 @@ class Coordinator(DataUpdateCoordinator):
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
+        # Listeners only run when the revision or activity moves (or
+        # availability flips), and entities skip the write unless a key they
+        # read is in self.dirty.
+        recovering = not self.last_update_success
+        revision = self.revision
+        activity = self.activity
+        before = flatten(self.state)
         try:
             if not self.spa:
-                self.spa = await self.spanet.get_spa(self.spa_id)
-            async with async_timeout.timeout(10):
-                await self.refresh_state()
+                self.spa = await async_get_spa(self.spanet, self.spa_id, self.local_address())
+            await self.refresh_state()
+            self.snapshot.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
 
         except SpaNetApiError as exc:
-            logger.error(f"API Error: {exc}")
+            self.dirty = None
+            logger.error("API Error: %s", exc)
             raise UpdateFailed("Failed updating spanet") from exc
+        finally:
+            # Home Assistant schedules the next refresh from when this returns.
+            self.update_interval = timedelta(seconds=self.next_tick_delay())
+
+        if recovering:
+            self.dirty = None
+        elif self.revision != revision:
+            self.dirty = self._changed_since(before)
+        elif self.activity != activity:
+            # Only counters moved: entities without state keys write, the
+            # rest skip.
+            self.dirty = set()
+        return self.revision, self.activity
+
+    def next_tick_delay(self):
+        """Seconds until this spa's next slot, plus jitter.
+
+        Home Assistant schedules refreshes on whole seconds (rounding down), so
+        a second is added to be sure the tick lands after the slot the tasks
+        are aligned to.
+        """
+        now = time.time()
+        return next_slot(now, UPDATE_INTERVAL, self.offset) - now + 1 + random.uniform(0, TICK_JITTER)
+
+    def _task_failed(self, task):
+        # The payload was fingerprinted when it was fetched; if its parser then
+        # raised, the same body would come back as UNCHANGED and the error
+        # would never repeat. Parse it again next time instead.
+        endpoint = TASK_ENDPOINTS[task.callback.__name__]
+        self.parsed.pop(endpoint, None)
+        if self.spa:
+            self.spa.invalidate(endpoint)
+
+    async def fetch(self, request):
+        """Fetch an endpoint, returning None if its payload hasn't changed."""
+        started = time.time()
+        data = await request()
+        if data is UNCHANGED:
+            return None
+        # Taken back by _task_failed if the payload doesn't parse.
+        self.parsed[request.__name__] = started
+        self.revision += 1
+        return data
 
     async def refresh_state(self):
-        await self.scheduler.tick()
-        logger.debug(f"Spa {self.spa_id} Status: {self.state}")
+        if await self.scheduler.tick() and self.metrics_watchers:
+            # Requests went out, so the request metrics moved.
+            self.activity += 1
+        self.reconcile()
+        self.scheduler.set_phase(self.poll_phase())
+        poll_trace.debug("status", spa=self.spa_id, phase=self.scheduler.phase, state=self.state)
 
     async def update_dashboard(self):
-        dashboard_data = await self.spa.get_dashboard()
-        logger.debug(f"Update Dashboard {dashboard_data}")
+        dashboard_data = await self.fetch(self.spa.get_dashboard)
+        if dashboard_data is None:
+            # Unchanged is still a reading: the temperature held steady.
+            self.observe_dashboard()
+            return
+        payload_trace.debug("dashboard", spa=self.spa_id, payload=dashboard_data)
 
         self.state[SK_SETTEMP] = dashboard_data["setTemperature"]
         self.state[SK_WATERTEMP] = dashboard_data["currentTemperature"]
@@ -250,7 +652,9 @@ class Coordinator(DataUpdateCoordinator):
         for s in dashboard_data["statusList"]:
             status_list.append(s.split(" ")[0])
 
-        force_refresh = self.state.get("statusList") != status_list
+        previous = self.state.get("statusList")
+        if previous != status_list:
+            self.status_changed = time.time()
 
         self.state["statusList"] = status_list
 
@@ -269,25 +673,95 @@ class Coordinator(DataUpdateCoordinator):
             status_flags.get(SF_FILTERING) or SL_FILTERING in status_list
         ) else 0
 
-        if force_refresh:
-            for task in self.tasks[1:]:
+        if previous is not None and previous != status_list:
+            for task in self.affected_tasks(set(previous) ^ set(status_list)):
                 task.trigger()
 
+        self.observe_dashboard()
+
+    def observe_dashboard(self):
+        now = time.time()
+        self.observe_duty("heater", self.state.get(SK_HEATER) == 1, OPT_HEATER_KW, DEFAULT_HEATER_KW, now)
+        self.observe_duty("filtration", self.state.get(SK_FILTERING) == 1, OPT_FILTRATION_KW, DEFAULT_FILTRATION_KW, now)
+
+        water = self.state.get(SK_WATERTEMP)
+        target = self.state.get(SK_SETTEMP)
+        if water is None or target is None:
+            return
+        self.history.add(now, int(water), int(target), self.state.get(SK_HEATER) == 1)
+        self.import_statistics()
+
+    def observe_pumps(self):
+        now = time.time()
+        for key, pump in self.state.get(SK_PUMPS, {}).items():
+            self.observe_duty(f"pump_{key}", pump.get("state") == "on", OPT_PUMP_KW, DEFAULT_PUMP_KW, now)
+        blower = self.state.get(SK_BLOWER)
+        if blower is not None:
+            self.observe_duty("blower", blower.get("status") not in (None, BLOWER_STATUS_OFF), OPT_BLOWER_KW, DEFAULT_BLOWER_KW, now)
+
+    def observe_duty(self, name, on, rating_option, rating_default, now):
+        rating = self.config_entry.options.get(rating_option, rating_default)
+        if self.duty.observe(name, on, now, dt_util.start_of_local_day().timestamp(), rating):
+            self.activity += 1
+
+    def import_statistics(self):
+        """Import hourly water temperature statistics straight into the recorder.
+
+        Long-term statistics come from the ring buffer, rather than from a
+        state_class on the sensor with every poll written to the states table.
+        """
+        if "recorder" not in self.hass.config.components:
+            return
+        hours = self.history.hourly(self.statistics_until, time.time())
+        if not hours:
+            return
+        metadata = {
+            "has_sum": False,
+            "name": f"{self.spa_name} Water Temperature",
+            "source": DOMAIN,
+            "statistic_id": f"{DOMAIN}:water_temperature_{self.spa_id}",
+            "unit_of_measurement": UnitOfTemperature.CELSIUS,
+        }
+        if StatisticMeanType is None:
+            metadata["has_mean"] = True
+        else:
+            metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+        if STATISTICS_UNIT_CLASS:
+            metadata["unit_class"] = TemperatureConverter.UNIT_CLASS
+        statistics = [
+            {"start": datetime.fromtimestamp(start, timezone.utc), "mean": mean, "min": low, "max": high}
+            for start, mean, low, high in hours
+        ]
+        async_add_external_statistics(self.hass, metadata, statistics)
+        self.statistics_until = hours[-1][0] + HOUR
+
+    def affected_tasks(self, statuses):
+        """Tasks whose endpoints can change along with the given statuses."""
+        names = set()
+        for status in statuses:
+            if status not in STATUS_TASKS:
+                return self.tasks[1:]
+            names.update(STATUS_TASKS[status])
+        return [task for task in self.tasks if task.callback.__name__ in names]
+
     async def update_pumps(self):
-        pump_data = await self.spa.get_pumps()
-        logger.debug(f"Update Pumps {pump_data}")
+        pump_data = await self.fetch(self.spa.get_pumps)
+        if pump_data is None:
+            self.observe_pumps()
+            return
+        payload_trace.debug("pumps", spa=self.spa_id, payload=pump_data)
 
         pumps = self.state.get("pumps", {})
         for p in pump_data.get("pumpAndBlower", {}).get("pumps", []):
             pump_id = str(p["pumpNumber"])
             if not pump_id in pumps:
-                pumps[pump_id] = {}
+                pumps[pump_id] = PumpState()
             pump = pumps.get(pump_id)
-            pump["apiId"] = str(p["id"])
-            pump["auto"] = p["hasAuto"]
-            pump["speeds"] = 1 # p["pumpSpeed"] Multiple speeds not supported
-            pump["hasSwitch"] = p["canSwitchOn"] and (not p["hasAuto"] or p["pumpSpeed"] > 1)
-            pump["state"] = p["pumpStatus"]
+            pump.apiId = str(p["id"])
+            pump.auto = p["hasAuto"]
+            pump.speeds = 1 # p["pumpSpeed"] Multiple speeds not supported
+            pump.hasSwitch = p["canSwitchOn"] and (not p["hasAuto"] or p["pumpSpeed"] > 1)
+            pump.state = p["pumpStatus"]
 
         self.state[SK_PUMPS] = pumps
 
@@ -295,16 +769,20 @@ class Coordinator(DataUpdateCoordinator):
         if blower and blower.get("id") is not None:
             # blowerStatus is "off", "vari" (variable speed) or "ramp";
             # coerce a missing/null status to "off" so is_on can't read a phantom on.
-            self.state[SK_BLOWER] = {
-                "apiId": str(blower["id"]),
-                "status": blower.get("blowerStatus") or BLOWER_STATUS_OFF,
-                "speed": blower.get("blowerVariableSpeed", 0),
-                "hasSwitch": blower.get("canSwitchOn", False),
-            }
+            self.state[SK_BLOWER] = BlowerState(
+                apiId=str(blower["id"]),
+                status=blower.get("blowerStatus") or BLOWER_STATUS_OFF,
+                speed=blower.get("blowerVariableSpeed", 0),
+                hasSwitch=blower.get("canSwitchOn", False),
+            )
+
+        self.observe_pumps()
 
     async def update_information(self):
-        information_data = await self.spa.get_information()
-        logger.debug(f"Update Information {information_data}")
+        information_data = await self.fetch(self.spa.get_information)
+        if information_data is None:
+            return
+        payload_trace.debug("information", spa=self.spa_id, payload=information_data)
 
         settingsSummary = information_data.get("information", {}).get("settingsSummary", {})
 
@@ -328,31 +806,35 @@ class Coordinator(DataUpdateCoordinator):
         for t in settingsSummary.get("sleepTimers", []):
             timer_id = str(t["timerNumber"])
             if not timer_id in timers:
-                timers[timer_id] = {}
+                timers[timer_id] = SleepTimerState()
             timer = timers.get(timer_id)
-            timer['number'] = t["timerNumber"]
-            timer["apiId"] = t["id"]
+            timer.number = t["timerNumber"]
+            timer.apiId = t["id"]
             if 'state' in t: # New format
-                timer['state'] = t['state']
+                timer.state = t['state']
             elif 'isEnabled' in t:
-                timer["state"] = 'on' if t["isEnabled"] else 'off'
+                timer.state = 'on' if t["isEnabled"] else 'off'
         self.state[SK_SLEEP_TIMERS] = timers
 
     async def update_lights(self):
-        light_details = await self.spa.get_light_details()
-        logger.debug(f"Update Lights {light_details}")
-        self.state[SK_LIGHTS] = {
-            "apiId": light_details.get('lightId'),
-            "state": "on" if light_details.get('lightOn') else "off",
-            "mode": light_details.get('lightMode'),
-            "colour": light_details.get('lightColour'),
-            "brightness": light_details.get('lightBrightness'),
-            "speed": light_details.get('lightSpeed'),
-        }
+        light_details = await self.fetch(self.spa.get_light_details)
+        if light_details is None:
+            return
+        payload_trace.debug("lights", spa=self.spa_id, payload=light_details)
+        self.state[SK_LIGHTS] = LightState(
+            apiId=light_details.get('lightId'),
+            state="on" if light_details.get('lightOn') else "off",
+            mode=light_details.get('lightMode'),
+            colour=light_details.get('lightColour'),
+            brightness=light_details.get('lightBrightness'),
+            speed=light_details.get('lightSpeed'),
+        )
 
     async def update_filtration(self):
-        data = await self.spa.get_filtration()
-        logger.debug(f"Update Filtration {data}")
+        data = await self.fetch(self.spa.get_filtration)
+        if data is None:
+            return
+        payload_trace.debug("filtration", spa=self.spa_id, payload=data)
         self.state[SK_FILT_RUNTIME] = data.get("totalRuntime")
         interval = data.get("inBetweenCycles")
         interval = str(interval) if interval is not None else None
@@ -360,8 +842,10 @@ class Coordinator(DataUpdateCoordinator):
         self.state[SK_FILT_INTERVAL] = interval if interval in FILTRATION_INTERVAL_OPTIONS else None
 
     async def update_settings(self):
-        data = await self.spa.get_settings_details()
-        logger.debug(f"Update Settings {data}")
+        data = await self.fetch(self.spa.get_settings_details)
+        if data is None:
+            return
+        payload_trace.debug("settings", spa=self.spa_id, payload=data)
 
         timeout = data.get("timeout")
         self.state[SK_TIMEOUT] = int(timeout) if str(timeout).isdigit() else None
@@ -0,0 +1,66 @@
+"""Diagnostics support for spanet."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .storage import account_key
+
+TO_REDACT = {"email", "password", "macAddress", "apiId", "id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the entry's spa state, polling schedule and request metrics."""
+    diagnostics = {
+        "entry": async_redact_data(dict(config_entry.data), TO_REDACT),
+        "options": dict(config_entry.options),
+    }
+    if "email" not in config_entry.data:
+        return diagnostics
+
+    account = hass.data[DOMAIN]["accounts"].get(account_key(config_entry.data))
+    if account is None:
+        return diagnostics
+
+    spas = []
+    for index, coordinator in enumerate(config_entry.runtime_data.values()):
+        spas.append({
+            # Spa ids are account identifiers, so number the spas instead.
+            "spa": index + 1,
+            "state": async_redact_data(coordinator.state.as_dict(), TO_REDACT),
+            "phase": coordinator.scheduler.phase,
+            "offset": coordinator.offset,
+            "tasks": {
+                task.callback.__name__: {
+                    "last_tick": task.last_tick,
+                    "next_tick": task.next_tick,
+                    "error_count": task.error_count,
+                    "suspended": task.suspended,
+                }
+                for task in coordinator.tasks
+            },
+            "metrics": {
+                name: endpoint.as_dict()
+                for name, endpoint in account["spanet"].metrics.for_spa(coordinator.spa_id).items()
+            },
+        })
+
+    metrics = account["spanet"].metrics
+    diagnostics["spas"] = spas
+    diagnostics["account"] = {
+        "token_refreshes": metrics.token_refreshes,
+        "timeline": metrics.timeline.as_dict(),
+        "connections": metrics.connections.as_dict(),
+        "endpoints": {
+            name: endpoint.as_dict()
+            for (spa, name), endpoint in metrics.endpoints.items()
+            if spa is None
+        },
+    }
+    return diagnostics
@@ -0,0 +1,68 @@
+"""Duty-cycle and energy counters for the spa's heater, pumps and blower.
+
+The coordinator feeds each counter the on/off state it sees on every poll, and
+the time since the previous poll is credited to the counter if it was on then.
+Energy accumulates at the rating in force at the time, so changing a rating
+never rewrites past consumption.
+"""
+
+
+class DutyCounter:
+    __slots__ = ("on", "last", "seconds", "energy", "day_start", "seconds_today")
+
+    def __init__(self, seconds=0.0, energy=0.0, day_start=0, seconds_today=0.0):
+        self.on = False
+        # No observation yet (or restored from a snapshot): nothing to credit.
+        self.last = None
+        self.seconds = seconds
+        self.energy = energy
+        self.day_start = day_start
+        self.seconds_today = seconds_today
+
+    def observe(self, on: bool, now: float, day_start: float, rating_kw: float):
+        """Record a reading; returns whether the counters moved."""
+        changed = False
+        if day_start != self.day_start:
+            changed = self.seconds_today != 0.0
+            self.day_start = day_start
+            self.seconds_today = 0.0
+        if self.on and self.last is not None and now > self.last:
+            elapsed = now - self.last
+            self.seconds += elapsed
+            self.seconds_today += now - max(self.last, day_start)
+            self.energy += elapsed / 3600 * rating_kw
+            changed = True
+        self.on = on
+        self.last = now
+        return changed
+
+    def as_dict(self):
+        return {
+            "seconds": self.seconds,
+            "energy": self.energy,
+            "day_start": self.day_start,
+            "seconds_today": self.seconds_today,
+        }
+
+
+class DutyCycles:
+    """Counters by name: "heater", "filtration", "blower", "pump_<number>"."""
+
+    def __init__(self, counters=None):
+        self.counters = counters or {}
+
+    def observe(self, name: str, on: bool, now: float, day_start: float, rating_kw: float):
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = DutyCounter()
+        return counter.observe(on, now, day_start, rating_kw)
+
+    def get(self, name: str):
+        return self.counters.get(name)
+
+    def as_dict(self):
+        return {name: counter.as_dict() for name, counter in self.counters.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({name: DutyCounter(**values) for name, values in data.items()})
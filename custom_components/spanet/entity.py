@@ -1,5 +1,6 @@
 """SpaNet Sensors"""
 from __future__ import annotations
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -7,9 +8,11 @@ from .const import DOMAIN
 
 
 class SpaEntity(CoordinatorEntity):
-    def __init__(self, coordinator, entity_type, name) -> None:
+    def __init__(self, coordinator, entity_type, name, state_keys=None) -> None:
         super().__init__(coordinator)
         self.hass = coordinator.hass
+        # State keys this entity renders; None means any change is relevant.
+        self._state_keys = state_keys
 
         self._attr_unique_id = (
             f"{entity_type}.{self._build_entity_id(coordinator.spa_id + '_' + name)}"
@@ -20,6 +23,26 @@ class SpaEntity(CoordinatorEntity):
             identifiers={(DOMAIN, self.coordinator.spa_id)},
         )
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Disabled entities are never added, so the coordinator only polls the
+        # endpoints that feed enabled ones.
+        self.async_on_remove(self.coordinator.subscribe(self._state_keys))
+
+    async def async_update(self) -> None:
+        """Update the entity; only used by the update_entity service.
+
+        An explicit update also fetches the on-demand settings it reads.
+        """
+        await self.coordinator.async_fetch_keys(self._state_keys)
+        await super().async_update()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Only write state when a key this entity reads has changed."""
+        if self.coordinator.is_dirty(self._state_keys):
+            super()._handle_coordinator_update()
+
     def _build_entity_id(self, name):
         entity_id = ""
         for char in name:
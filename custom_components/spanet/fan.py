@@ -24,9 +24,9 @@ async def async_setup_entry(
     async_add_entity: AddEntitiesCallback,
 ) -> bool:
     entities = []
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
         blower = coordinator.state.get(SK_BLOWER)
-        if blower and blower.get("hasSwitch"):
+        if blower and blower.hasSwitch:
             entities.append(SpaBlowerFan(coordinator, "Blower"))
     async_add_entity(entities)
 
@@ -44,27 +44,25 @@ class SpaBlowerFan(SpaEntity, FanEntity):
     _attr_speed_count = SPEED_RANGE[1] - SPEED_RANGE[0] + 1
 
     def __init__(self, coordinator, name) -> None:
-        super().__init__(coordinator, "fan", name)
-
-    def _blower(self):
-        return self.coordinator.get_state(SK_BLOWER)
+        super().__init__(coordinator, "fan", name, (SK_BLOWER,))
+        self._blower = coordinator.accessor(SK_BLOWER)
 
     @property
     def is_on(self):
-        return self._blower().get("status", BLOWER_STATUS_OFF) != BLOWER_STATUS_OFF
+        return self._blower().status != BLOWER_STATUS_OFF
 
     @property
     def preset_mode(self):
-        return PRESET_RAMP if self._blower().get("status") == BLOWER_STATUS_RAMP else None
+        return PRESET_RAMP if self._blower().status == BLOWER_STATUS_RAMP else None
 
     @property
     def percentage(self):
         # Only variable mode has a meaningful speed; ramp/off report None so a
         # SET_SPEED fan card doesn't render an active ramp as a 0% (off) dial.
         blower = self._blower()
-        if blower.get("status") != BLOWER_STATUS_VARIABLE:
+        if blower.status != BLOWER_STATUS_VARIABLE:
             return None
-        return ranged_value_to_percentage(SPEED_RANGE, blower.get("speed") or 1)
+        return ranged_value_to_percentage(SPEED_RANGE, blower.speed or 1)
 
     async def async_set_percentage(self, percentage: int):
         if percentage == 0:
@@ -78,15 +76,16 @@ class SpaBlowerFan(SpaEntity, FanEntity):
             await self.coordinator.set_blower_mode(BLOWER_MODE_RAMP)
 
     async def async_turn_on(self, percentage=None, preset_mode=None, **kwargs):
-        if preset_mode == PRESET_RAMP:
-            await self.coordinator.set_blower_mode(BLOWER_MODE_RAMP)
-        elif percentage is not None:
-            await self.async_set_percentage(percentage)
-        else:
-            # Default "on" = variable at the last known speed (fall back to max).
-            await self.coordinator.set_blower_mode(
-                BLOWER_MODE_VARIABLE, self._blower().get("speed") or SPEED_RANGE[1]
-            )
+        async with self.coordinator.command_batch():
+            if preset_mode == PRESET_RAMP:
+                await self.coordinator.set_blower_mode(BLOWER_MODE_RAMP)
+            elif percentage is not None:
+                await self.async_set_percentage(percentage)
+            else:
+                # Default "on" = variable at the last known speed (fall back to max).
+                await self.coordinator.set_blower_mode(
+                    BLOWER_MODE_VARIABLE, self._blower().speed or SPEED_RANGE[1]
+                )
 
     async def async_turn_off(self, **kwargs):
         await self.coordinator.set_blower_mode(BLOWER_MODE_OFF)
@@ -0,0 +1,65 @@
+"""Account-wide request budget for the SpaNET cloud.
+
+The cloud throttles per account, and every spa coordinator on a login shares
+one SpaNet client, so their requests are drawn from a single token bucket.
+Each priority class keeps a floor of tokens in reserve for the classes above
+it: when the bucket runs low the settings endpoints are deferred first, then
+pumps, then the dashboard, while user commands wait for the next token rather
+than fail.
+"""
+import time
+
+# An endpoint's first fetch for a spa: platforms build entities from it, so
+# it's never deferred. It still takes a token, borrowing one (the bucket goes
+# below zero) when there's none left.
+PRIORITY_INITIAL = -1
+PRIORITY_COMMAND = 0
+PRIORITY_DASHBOARD = 1
+PRIORITY_PUMPS = 2
+PRIORITY_SETTINGS = 3
+
+# Tokens that must remain in the bucket after a request of each class.
+PRIORITY_FLOORS = {
+    PRIORITY_COMMAND: 0,
+    PRIORITY_DASHBOARD: 2,
+    PRIORITY_PUMPS: 4,
+    PRIORITY_SETTINGS: 8,
+}
+
+# SpaPool methods polled more often than the settings endpoints.
+ENDPOINT_PRIORITIES = {
+    "get_dashboard": PRIORITY_DASHBOARD,
+    "get_pumps": PRIORITY_PUMPS,
+}
+
+# Sustained rate (requests per second) and burst size for one account.
+GOVERNOR_RATE = 0.5
+GOVERNOR_BURST = 20
+
+
+class RequestGovernor:
+    def __init__(self, rate=GOVERNOR_RATE, burst=GOVERNOR_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, priority: int) -> float:
+        """Take a token for a request of the given priority.
+
+        Returns 0 if one was taken, otherwise the seconds until the bucket
+        holds enough tokens for that priority.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if priority == PRIORITY_INITIAL:
+            self.tokens -= 1
+            return 0
+
+        floor = PRIORITY_FLOORS[priority]
+        if self.tokens - 1 >= floor:
+            self.tokens -= 1
+            return 0
+        return (floor + 1 - self.tokens) / self.rate
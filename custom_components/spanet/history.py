@@ -0,0 +1,117 @@
+"""Recent water temperature history for one spa.
+
+Samples are kept in fixed-size typed arrays used as a ring buffer, so a day
+of one-minute polls costs a few tens of kilobytes and no per-sample objects.
+"""
+from array import array
+from bisect import bisect_left
+from statistics import fmean, linear_regression, StatisticsError
+
+HISTORY_SIZE = 1440
+# The heating rate is fitted over the latest run of heating samples within
+# this window, once it spans at least RATE_MIN_SPAN seconds.
+RATE_WINDOW = 3600
+RATE_MIN_SPAN = 600
+RATE_MIN_SAMPLES = 3
+HOUR = 3600
+
+
+class TemperatureHistory:
+    def __init__(self, size: int = HISTORY_SIZE):
+        self.size = size
+        self.times = array("d", bytes(8 * size))
+        # Temperatures in tenths of a degree, as the API reports them.
+        self.water = array("h", bytes(2 * size))
+        self.target = array("h", bytes(2 * size))
+        self.heating = array("b", bytes(size))
+        self.count = 0
+        self.next = 0
+
+    def add(self, timestamp: float, water: int, target: int, heating: bool):
+        if self.count and timestamp <= self.times[self.next - 1]:
+            return
+        i = self.next
+        self.times[i] = timestamp
+        self.water[i] = water
+        self.target[i] = target
+        self.heating[i] = 1 if heating else 0
+        self.next = (i + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def _ordered(self, values):
+        """Samples oldest first, as a contiguous array."""
+        if self.count < self.size:
+            return values[:self.count]
+        return values[self.next:] + values[:self.next]
+
+    def since(self, start: float):
+        """(times, water, target, heating) arrays for samples at or after start."""
+        times = self._ordered(self.times)
+        first = bisect_left(times, start)
+        return (
+            times[first:],
+            self._ordered(self.water)[first:],
+            self._ordered(self.target)[first:],
+            self._ordered(self.heating)[first:],
+        )
+
+    @property
+    def latest(self):
+        if not self.count:
+            return None
+        i = self.next - 1
+        return self.times[i], self.water[i], self.target[i], bool(self.heating[i])
+
+    def heating_rate(self):
+        """Degrees C per hour over the latest heating run, or None."""
+        latest = self.latest
+        if latest is None:
+            return None
+        times, water, _, heating = self.since(latest[0] - RATE_WINDOW)
+        end = len(heating)
+        while end and not heating[end - 1]:
+            end -= 1
+        start = end
+        while start and heating[start - 1]:
+            start -= 1
+        if end - start < RATE_MIN_SAMPLES or times[end - 1] - times[start] < RATE_MIN_SPAN:
+            return None
+        try:
+            slope, _ = linear_regression(times[start:end], water[start:end])
+        except StatisticsError:
+            return None
+        return round(slope * HOUR / 10, 2)
+
+    def time_to_target(self):
+        """Minutes until the water reaches the set temperature while heating.
+
+        0 once it's there, None when not heating or the rate isn't known yet.
+        """
+        latest = self.latest
+        if latest is None:
+            return None
+        _, water, target, heating = latest
+        if water >= target:
+            return 0
+        rate = self.heating_rate()
+        if not heating or not rate or rate <= 0:
+            return None
+        return round((target - water) / 10 / rate * 60)
+
+    def hourly(self, after: float, before: float):
+        """(hour start, mean, min, max) water temperature for each complete hour.
+
+        Covers hours starting at or after `after` and ending by `before`.
+        """
+        times, water, _, _ = self.since(after)
+        hours = []
+        i = 0
+        while i < len(times):
+            hour = times[i] // HOUR * HOUR
+            if hour + HOUR > before:
+                break
+            j = bisect_left(times, hour + HOUR, i)
+            values = water[i:j]
+            hours.append((hour, fmean(values) / 10, min(values) / 10, max(values) / 10))
+            i = j
+        return hours
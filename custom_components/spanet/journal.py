@@ -0,0 +1,77 @@
+import time
+
+# Stands in for the value of a state key that didn't exist before a command.
+MISSING = object()
+
+
+class PendingWrite:
+    __slots__ = ("value", "previous", "expires", "checked", "polled")
+
+    def __init__(self, value, previous, sent: float, expires: float):
+        self.value = value
+        self.previous = previous
+        self.expires = expires
+        # When the last payload looked at was fetched; only payloads fetched
+        # after this can confirm the write.
+        self.checked = sent
+        # What the cloud last reported for the key while the write was pending.
+        self.polled = MISSING
+
+
+class CommandJournal:
+    """Pending optimistic writes, per state key.
+
+    Each set_* records the value it wrote and the value it replaced. Until a
+    payload fetched after the command reports the written value, or the
+    confirmation window runs out, polled values for the key are masked with the
+    pending one so stale cloud data doesn't flip the entity back. If the PUT
+    fails the replaced value is handed back for the coordinator to restore.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.entries = {}
+
+    def record(self, key: str, value, previous):
+        pending = self.entries.get(key)
+        if pending is not None:
+            # Stacked writes roll back to the value from before the first one.
+            previous = pending.previous
+        now = time.time()
+        self.entries[key] = PendingWrite(value, previous, now, now + self.window)
+
+    def rollback(self, keys):
+        """Drop the pending writes for keys, returning the values they replaced."""
+        return {key: self.entries.pop(key).previous for key in keys if key in self.entries}
+
+    def reconcile(self, read, write, fetched_at, expired):
+        """Confirm or mask pending writes against freshly parsed payloads.
+
+        fetched_at(key) is when the payload key is read from was last fetched
+        and parsed. A key is only compared once a payload fetched after the
+        command (or after the last comparison) has been parsed: until then the
+        state holds the optimistic value, which would confirm itself. A write
+        still unconfirmed when the window runs out is dropped: the last polled
+        value is written back, and expired(key) has the endpoint parsed again
+        next poll. Returns the keys written back.
+        """
+        now = time.time()
+        restored = []
+        for key, pending in list(self.entries.items()):
+            fetched = fetched_at(key)
+            if fetched > pending.checked:
+                pending.checked = fetched
+                current = read(key)
+                if current is MISSING or current == pending.value:
+                    del self.entries[key]
+                    continue
+                pending.polled = current
+            if now >= pending.expires:
+                del self.entries[key]
+                if pending.polled is not MISSING:
+                    write(key, pending.polled)
+                    restored.append(key)
+                expired(key)
+            elif pending.polled is not MISSING:
+                write(key, pending.value)
+        return restored
@@ -26,7 +26,7 @@ async def async_setup_entry(
     async_add_entity: AddEntitiesCallback,
 ) -> bool:
     entities = []
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
         if SK_LIGHTS in coordinator.state:
             entities.append(SpaLight(coordinator))
     async_add_entity(entities)
@@ -65,48 +65,49 @@ class SpaLight(SpaEntity, LightEntity):
     _attr_effect_list = LIGHT_MODES
 
     def __init__(self, coordinator) -> None:
-        super().__init__(coordinator, "light", "Lights")
+        super().__init__(coordinator, "light", "Lights", (SK_LIGHTS,))
         self.hass = coordinator.hass
-
-    def _lights(self):
-        return self.coordinator.get_state(SK_LIGHTS)
+        self._lights = coordinator.accessor(SK_LIGHTS)
 
     @property
     def is_on(self):
-        return self._lights().get("state") == "on"
+        return self._lights().state == "on"
 
     @property
     def brightness(self):
-        return level_to_ha(self._lights().get("brightness"))
+        return level_to_ha(self._lights().brightness)
 
     @property
     def rgb_color(self):
         # Fall back to white for a colour name we don't have mapped, so the
         # RGB color mode always has a valid value (spa models may differ).
-        return LIGHT_COLOURS.get(self._lights().get("colour"), (255, 255, 255))
+        return LIGHT_COLOURS.get(self._lights().colour, (255, 255, 255))
 
     @property
     def effect(self):
-        mode = self._lights().get("mode")
+        mode = self._lights().mode
         return mode if mode in LIGHT_MODES else None
 
     async def async_turn_on(self, **kwargs):
         lights = self._lights()
 
-        # A colour pick also forces the controller back into solid-colour mode.
-        if ATTR_RGB_COLOR in kwargs:
-            await self.coordinator.set_light_colour(nearest_colour(kwargs[ATTR_RGB_COLOR]))
-            if lights.get("mode") != "colour":
-                await self.coordinator.set_light_mode("colour")
+        # All attribute changes go out as one batch: the PUTs are sent in this
+        # order, followed by a single refresh and state write.
+        async with self.coordinator.command_batch():
+            # A colour pick also forces the controller back into solid-colour mode.
+            if ATTR_RGB_COLOR in kwargs:
+                await self.coordinator.set_light_colour(nearest_colour(kwargs[ATTR_RGB_COLOR]))
+                if lights.mode != "colour":
+                    await self.coordinator.set_light_mode("colour")
 
-        if ATTR_EFFECT in kwargs:
-            await self.coordinator.set_light_mode(kwargs[ATTR_EFFECT])
+            if ATTR_EFFECT in kwargs:
+                await self.coordinator.set_light_mode(kwargs[ATTR_EFFECT])
 
-        if ATTR_BRIGHTNESS in kwargs:
-            await self.coordinator.set_light_brightness(ha_to_level(kwargs[ATTR_BRIGHTNESS]))
+            if ATTR_BRIGHTNESS in kwargs:
+                await self.coordinator.set_light_brightness(ha_to_level(kwargs[ATTR_BRIGHTNESS]))
 
-        if not self.is_on:
-            await self.coordinator.set_lights("on")
+            if not self.is_on:
+                await self.coordinator.set_lights("on")
 
     async def async_turn_off(self, **kwargs):
         await self.coordinator.set_lights("off")
@@ -0,0 +1,247 @@
+"""Direct LAN control of a spa's WiFi module.
+
+The SpaNET WiFi module listens on TCP port 9090 and speaks the line protocol
+the SpaNET app used before the v2 cloud API. Only a small, community
+documented subset is used here: reading the status rows and setting the
+temperature and pumps. Field positions in the status rows can differ between
+controller firmware versions; they're collected in STATUS_FIELDS so they can
+be checked against a given spa.
+
+LocalSpaPool keeps the SpaPool method surface. Calls in the subset go over the
+socket and everything else, or any call while the module can't be reached,
+goes to the cloud.
+"""
+import asyncio
+import logging
+import time
+
+from .spanet import GET_BUDGET, SpaPool, UNCHANGED
+from .trace import Tracer
+
+logger = logging.getLogger(__name__)
+local_trace = Tracer("local")
+
+LOCAL_PORT = 9090
+LOCAL_TIMEOUT = 3
+# After a failure the module is left alone (cloud only) for this long.
+LOCAL_RETRY_AFTER = 300
+# A reply is complete once the module has been quiet for this long.
+REPLY_IDLE = 0.2
+
+READ_STATUS = "RF"
+SET_TEMPERATURE = "W40"
+PUMP_COMMANDS = {1: "S22", 2: "S23", 3: "S24", 4: "S25", 5: "S26"}
+PUMP_MODES = {"off": 0, "on": 1, "auto": 4}
+
+# (row, index) of each field in the split RF reply rows, e.g. ",R5,..." splits
+# to ["", "R5", ...].
+STATUS_FIELDS = {
+    "currentTemperature": ("R5", 16),
+    "heating": ("R5", 13),
+    "sleeping": ("R5", 11),
+    "sanitise": ("R5", 17),
+    "filtering": ("R5", 18),
+    "setTemperature": ("R6", 9),
+}
+
+
+class LocalProtocolError(Exception):
+    """The module answered with something we can't parse"""
+
+
+def parse_host(value: str):
+    host, _, port = value.strip().rpartition(":")
+    if not host or not port.isdigit():
+        return value.strip(), LOCAL_PORT
+    return host, int(port)
+
+
+def parse_local_hosts(value: str, spa_ids):
+    """Parse the local address option into {spa id: (host, port)}.
+
+    Entries are comma separated "spa_id=host[:port]"; a bare "host[:port]" is
+    accepted when the account has a single spa.
+    """
+    hosts = {}
+    for entry in (value or "").split(","):
+        if not entry.strip():
+            continue
+        spa_id, sep, host = entry.partition("=")
+        if not sep:
+            if len(spa_ids) != 1:
+                logger.warning("Local address %s needs a spa id (one of %s)", entry.strip(), ", ".join(spa_ids))
+                continue
+            spa_id, host = spa_ids[0], entry
+        hosts[spa_id.strip()] = parse_host(host)
+    return hosts
+
+
+class LocalConnection:
+    """One TCP connection to a spa's WiFi module, used one command at a time."""
+
+    def __init__(self, host: str, port: int = LOCAL_PORT):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()
+
+    async def command(self, line: str):
+        """Send a command line and return the reply lines."""
+        async with self.lock:
+            try:
+                return await asyncio.wait_for(self._command(line), LOCAL_TIMEOUT)
+            except BaseException:
+                await self.close()
+                raise
+
+    async def _command(self, line):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+
+        reply = await self.reader.readline()
+        if not reply:
+            raise ConnectionResetError(f"{self.host} closed the connection")
+        lines = [reply]
+        while True:
+            try:
+                more = await asyncio.wait_for(self.reader.readline(), REPLY_IDLE)
+            except asyncio.TimeoutError:
+                break
+            if not more:
+                break
+            lines.append(more)
+        return [line.decode(errors="replace").strip() for line in lines if line.strip()]
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+def parse_status(lines):
+    rows = {}
+    for line in lines:
+        fields = line.split(",")
+        if len(fields) > 1 and fields[1].startswith("R"):
+            rows[fields[1]] = fields
+    try:
+        values = {name: rows[row][index] for name, (row, index) in STATUS_FIELDS.items()}
+        return {
+            "setTemperature": int(values["setTemperature"]),
+            "currentTemperature": int(values["currentTemperature"]),
+            "heating": values["heating"] == "1",
+            "sleeping": values["sleeping"] == "1",
+            "sanitise": values["sanitise"] == "1",
+            "filtering": values["filtering"] == "1",
+        }
+    except (KeyError, IndexError, ValueError) as e:
+        raise LocalProtocolError(f"Unexpected status reply: {lines!r}") from e
+
+
+class LocalSpaPool(SpaPool):
+    def __init__(self, config, client, connection: LocalConnection):
+        super().__init__(config, client)
+        self.connection = connection
+        self.unreachable_until = 0
+        self.last_dashboard = None
+        # Cloud pump id -> pump number, learnt from get_pumps.
+        self.pump_numbers = {}
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.unreachable_until
+
+    async def local(self, name, line):
+        """Run a command on the module, or return None if the cloud should be used."""
+        if not self.available:
+            return None
+        start = time.monotonic()
+        try:
+            reply = await self.connection.command(line)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.client.metrics.record((self.id, f"local_{name}"), None, (time.monotonic() - start) * 1000, 0)
+            logger.warning("Spa %s unreachable on the LAN (%s), using the cloud for %ds", self.name, e, LOCAL_RETRY_AFTER)
+            self.unreachable_until = time.monotonic() + LOCAL_RETRY_AFTER
+            return None
+        self.client.metrics.record((self.id, f"local_{name}"), 200, (time.monotonic() - start) * 1000, sum(map(len, reply)))
+        local_trace.debug(name, spa=self.id, line=line, reply=reply)
+        return reply
+
+    def invalidate(self, *names):
+        super().invalidate(*names)
+        if not names or "get_dashboard" in names:
+            self.last_dashboard = None
+
+    async def get_dashboard(self):
+        start = time.monotonic()
+        reply = await self.local("get_dashboard", READ_STATUS)
+        if reply is not None:
+            try:
+                status = parse_status(reply)
+            except LocalProtocolError as e:
+                logger.warning("Spa %s: %s", self.name, e)
+                self.unreachable_until = time.monotonic() + LOCAL_RETRY_AFTER
+            else:
+                # Same shape as the cloud's /Dashboard payload.
+                status_list = [
+                    label for label, on in (
+                        ("Heating", status["heating"]),
+                        ("Sleeping", status["sleeping"]),
+                        ("Sanitise", status["sanitise"]),
+                        ("Filtering", status["filtering"]),
+                    ) if on
+                ]
+                dashboard = {
+                    "setTemperature": status["setTemperature"],
+                    "currentTemperature": status["currentTemperature"],
+                    "statusList": status_list,
+                    "sanitiseOn": status["sanitise"],
+                    "statusFlags": {"SanitiseOn": status["sanitise"], "Filtering": status["filtering"]},
+                }
+                if dashboard == self.last_dashboard:
+                    return UNCHANGED
+                self.last_dashboard = dashboard
+                return dashboard
+        # The cloud fallback gets what the LAN attempt left of the budget, so
+        # the two together fit in the scheduler's task timeout.
+        return await super().get_dashboard(GET_BUDGET - (time.monotonic() - start))
+
+    async def get_pumps(self):
+        data = await super().get_pumps()
+        if data is not UNCHANGED:
+            for pump in data.get("pumpAndBlower", {}).get("pumps", []):
+                self.pump_numbers[str(pump["id"])] = pump["pumpNumber"]
+        return data
+
+    async def set_temperature(self, temp: int):
+        if await self.local("set_temperature", f"{SET_TEMPERATURE}:{int(temp)}") is not None:
+            return
+        return await super().set_temperature(temp)
+
+    async def set_pump(self, pump_id: str, state: str):
+        command = PUMP_COMMANDS.get(self.pump_numbers.get(str(pump_id)))
+        if command and state in PUMP_MODES:
+            if await self.local("set_pump", f"{command}:{PUMP_MODES[state]}") is not None:
+                return
+        return await super().set_pump(pump_id, state)
+
+
+async def async_get_spa(spanet, spa_id, address=None):
+    """SpaNet.get_spa, giving a LocalSpaPool when the spa has a LAN address.
+
+    Connections are kept in spanet.spa_sockets, one per spa.
+    """
+    spa = await spanet.get_spa(spa_id)
+    if address is None:
+        return spa
+    connection = spanet.spa_sockets.get(spa_id)
+    if connection is None or (connection.host, connection.port) != address:
+        connection = spanet.spa_sockets[spa_id] = LocalConnection(*address)
+    return LocalSpaPool(spa.config, spa.client, connection)
@@ -0,0 +1,215 @@
+"""Request metrics for the SpaNET API client.
+
+HttpClient records every request against a tag: (spa id, SpaPool method) for
+spa endpoints, (None, name) for account calls such as login and /Devices.
+Latencies go into a fixed-bucket histogram, so memory stays constant however
+long Home Assistant runs, and percentiles are read off the bucket bounds.
+Request start times also go into a RequestTimeline, which measures how bursty
+the account's traffic is.
+"""
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# Upper bounds of the latency buckets, in milliseconds.
+LATENCY_BUCKETS = (25, 50, 100, 150, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, float("inf"))
+
+# Requests are counted in TIMELINE_BIN second bins over the last TIMELINE_WINDOW.
+TIMELINE_BIN = 5
+TIMELINE_WINDOW = 600
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0
+
+    def add(self, ms: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, ms)] += 1
+        self.total += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+
+    def percentile(self, p: float):
+        """Upper bound of the bucket holding the p-th percentile, or None if empty."""
+        if not self.total:
+            return None
+        rank = p / 100 * self.total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                # Anything past the last finite bucket reports that bound.
+                return bound if bound != float("inf") else LATENCY_BUCKETS[-2]
+        return LATENCY_BUCKETS[-2]
+
+    def as_dict(self):
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {
+                str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.counts) if count
+            },
+        }
+
+
+class RequestTimeline:
+    """Requests per bin over a sliding window, kept in a ring of counters."""
+
+    def __init__(self, bin_seconds: int = TIMELINE_BIN, window: int = TIMELINE_WINDOW):
+        self.bin_seconds = bin_seconds
+        self.bins = [0] * (window // bin_seconds)
+        # Absolute number of the newest bin, None before the first request.
+        self.current = None
+
+    def _advance(self, now: float):
+        current = int(now // self.bin_seconds)
+        if self.current is None:
+            self.current = current
+            return
+        for number in range(self.current + 1, min(current, self.current + len(self.bins)) + 1):
+            self.bins[number % len(self.bins)] = 0
+        self.current = max(self.current, current)
+
+    def add(self, now: float):
+        self._advance(now)
+        number = int(now // self.bin_seconds)
+        if number > self.current - len(self.bins):
+            self.bins[number % len(self.bins)] += 1
+
+    def burstiness(self, now: float = None):
+        """Peak-to-mean ratio of requests per bin, or None without traffic.
+
+        1 means requests are spread evenly over the window; the number of bins
+        (120 by default) means they all arrived within one bin.
+        """
+        self._advance(time.monotonic() if now is None else now)
+        total = sum(self.bins)
+        if not total:
+            return None
+        return round(max(self.bins) * len(self.bins) / total, 1)
+
+    def as_dict(self):
+        return {
+            "bin_seconds": self.bin_seconds,
+            "requests": sum(self.bins),
+            "peak": max(self.bins),
+            "burstiness": self.burstiness(),
+        }
+
+
+class ConnectionMetrics:
+    """Connection pool activity, from the session's trace config."""
+
+    def __init__(self):
+        self.opened = 0
+        self.reused = 0
+        self.connect = LatencyHistogram()
+        self.resolve = LatencyHistogram()
+
+    def created(self, ms: float):
+        self.opened += 1
+        self.connect.add(ms)
+
+    def dns(self, ms: float):
+        self.resolve.add(ms)
+
+    def as_dict(self):
+        return {
+            "opened": self.opened,
+            "reused": self.reused,
+            "connect_ms": self.connect.as_dict(),
+            "dns_ms": self.resolve.as_dict(),
+        }
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        # Decoded body bytes. Bytes on the wire (smaller when compressed) are
+        # only known for some responses: wire_bytes and measured_bytes cover
+        # those, and unmeasured counts the rest.
+        self.bytes = 0
+        self.wire_bytes = 0
+        self.measured_bytes = 0
+        self.unmeasured = 0
+        self.deferred = 0
+        self.statuses = Counter()
+        self.latency = LatencyHistogram()
+
+    def record(self, status, ms: float, size: int, wire_size: int = None):
+        self.requests += 1
+        self.bytes += size
+        if wire_size is not None:
+            self.wire_bytes += wire_size
+            self.measured_bytes += size
+        elif size:
+            self.unmeasured += 1
+        # status is None when the request never got a response (timeout, DNS...).
+        self.statuses[status or "error"] += 1
+        if status is None or status >= 400:
+            self.failures += 1
+        self.latency.add(ms)
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.failures += other.failures
+        self.bytes += other.bytes
+        self.wire_bytes += other.wire_bytes
+        self.measured_bytes += other.measured_bytes
+        self.unmeasured += other.unmeasured
+        self.deferred += other.deferred
+        self.statuses.update(other.statuses)
+        self.latency.merge(other.latency)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "wire_bytes": self.wire_bytes,
+            "measured_bytes": self.measured_bytes,
+            "unmeasured": self.unmeasured,
+            "deferred": self.deferred,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "latency_ms": self.latency.as_dict(),
+        }
+
+
+class RequestMetrics:
+    """Per-endpoint counters shared by all HttpClients of one SpaNet account."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.token_refreshes = 0
+        self.timeline = RequestTimeline()
+        self.connections = ConnectionMetrics()
+
+    def endpoint(self, tag):
+        endpoint = self.endpoints.get(tag)
+        if endpoint is None:
+            endpoint = self.endpoints[tag] = EndpointMetrics()
+        return endpoint
+
+    def record(self, tag, status, ms: float, size: int, wire_size: int = None):
+        self.endpoint(tag).record(status, ms, size, wire_size)
+        # Recorded on completion, so the send time is latency earlier.
+        self.timeline.add(time.monotonic() - ms / 1000)
+
+    def defer(self, tag):
+        """Count a request the governor held back without sending."""
+        self.endpoint(tag).deferred += 1
+
+    def for_spa(self, spa_id: str):
+        return {name: endpoint for (spa, name), endpoint in self.endpoints.items() if spa == spa_id}
+
+    def spa_total(self, spa_id: str):
+        total = EndpointMetrics()
+        for endpoint in self.for_spa(spa_id).values():
+            total.merge(endpoint)
+        return total
@@ -16,7 +16,7 @@ async def async_setup_entry(
     async_add_entity: AddEntitiesCallback,
 ) -> bool:
     entities = []
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
         if SK_FILT_RUNTIME in coordinator.state:
             entities.append(SpaNumber(
                 coordinator, "Filtration Runtime", SK_FILT_RUNTIME,
@@ -38,9 +38,10 @@ class SpaNumber(SpaEntity, NumberEntity):
     _attr_mode = NumberMode.BOX
 
     def __init__(self, coordinator, name, state_key, min_v, max_v, unit, icon, setter) -> None:
-        super().__init__(coordinator, "number", name)
+        super().__init__(coordinator, "number", name, (state_key,))
         self.hass = coordinator.hass
         self._state_key = state_key
+        self._value = coordinator.accessor(state_key)
         self._setter = setter
         self._attr_native_min_value = min_v
         self._attr_native_max_value = max_v
@@ -49,7 +50,7 @@ class SpaNumber(SpaEntity, NumberEntity):
 
     @property
     def native_value(self):
-        value = self.coordinator.get_state(self._state_key)
+        value = self._value()
         return None if value is None else int(value)
 
     async def async_set_native_value(self, value: float):
@@ -66,12 +67,13 @@ class SpaLightSpeed(SpaEntity, NumberEntity):
     _attr_icon = "mdi:speedometer"
 
     def __init__(self, coordinator) -> None:
-        super().__init__(coordinator, "number", "Light Speed")
+        super().__init__(coordinator, "number", "Light Speed", (f"{SK_LIGHTS}.speed",))
         self.hass = coordinator.hass
+        self._value = coordinator.accessor(f"{SK_LIGHTS}.speed")
 
     @property
     def native_value(self):
-        return self.coordinator.get_state(SK_LIGHTS).get("speed")
+        return self._value()
 
     async def async_set_native_value(self, value: float):
         await self.coordinator.set_light_speed(int(value))
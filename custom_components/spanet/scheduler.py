@@ -1,41 +1,152 @@
+import asyncio
+import hashlib
+import math
+import random
 import time
 import logging
-import traceback
+
+import async_timeout
+
+from .const import PHASE_ACTIVE, PHASE_NORMAL, PHASE_IDLE, LAZY_MAX_AGE, TASK_JITTER
+from .spanet import SpaNetBackoff
 
 logger = logging.getLogger(__name__)
 
+# Successive task offsets step by the golden ratio, which keeps them evenly
+# spread whatever the number of tasks.
+OFFSET_STEP = (math.sqrt(5) - 1) / 2
+
+
+def slot_offset(key: str):
+    """A stable fraction in [0, 1) for key, e.g. a spa id."""
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], "big") / 2**32
+
+
+def next_slot(now, period: int, offset: float):
+    """The first time on the grid period * (n + offset) at least half a period after now.
+
+    Runs that start on time land exactly a period apart; a run that's late
+    or early (a refresh, a phase change) moves back onto the grid.
+    """
+    slot = int(offset * period)
+    return (int(now + period / 2) - slot) // period * period + period + slot
+
+
 class Task:
-    def __init__(self, interval: int, callback):
+    def __init__(self, interval: int, callback, active_interval=None, idle_interval=None):
         self.interval = interval
+        self.intervals = {
+            PHASE_ACTIVE: active_interval or interval,
+            PHASE_NORMAL: interval,
+            PHASE_IDLE: idle_interval or interval,
+        }
         self.callback = callback
         self.next_tick = 0
+        self.last_tick = 0
         self.error_count = 0
+        # Where this task's runs fall within its period, see next_slot().
+        self.offset = 0.0
+        # On-demand tasks only run on the schedule once LAZY_MAX_AGE old; in
+        # between the coordinator fetches them when a command or an entity
+        # update asks for them.
+        self.on_demand = False
+        self.running = False
+        # No enabled entity reads this task's data.
+        self.suspended = False
+
+    def due(self, now):
+        if self.suspended:
+            return False
+        if self.on_demand:
+            return now - self.last_tick >= LAZY_MAX_AGE
+        return self.next_tick <= now
 
     def trigger(self, delay=None):
         self.next_tick = (int(time.time()) + delay) if delay != None else 0
 
+    def period(self, phase):
+        return self.intervals.get(phase, self.interval)
+
+    def next_after(self, now, phase):
+        return next_slot(now, self.period(phase), self.offset)
+
 
 class Scheduler:
 
-    def __init__(self):
+    def __init__(self, max_concurrent=1, timeout=10, offset=0.0, on_error=None):
         self.tasks = []
+        self.offset = offset
+        # Called with the task when its callback raises.
+        self.on_error = on_error
+        self.phase = PHASE_NORMAL
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrent)
 
-    def add_task(self, interval: int, callback):
-        task = Task(interval, callback)
+    def add_task(self, interval: int, callback, active_interval=None, idle_interval=None):
+        task = Task(interval, callback, active_interval, idle_interval)
+        task.offset = (self.offset + len(self.tasks) * OFFSET_STEP) % 1
         self.tasks.append(task)
         return task
 
-    async def tick(self):
-        now = int(time.time())
+    def set_phase(self, phase):
+        if phase == self.phase:
+            return
+        logger.debug("Polling phase %s -> %s", self.phase, phase)
+        self.phase = phase
+        # Pull tasks forward when the new phase is faster; a slower phase takes
+        # effect naturally the next time each task runs.
         for task in self.tasks:
-            if task.next_tick <= now:
-                try:
+            if task.last_tick:
+                task.next_tick = min(task.next_tick, task.next_after(task.last_tick, phase))
+
+    async def tick(self):
+        # Due tasks run concurrently (bounded by the semaphore), each under its
+        # own timeout. Tasks made due by another task during the tick (e.g. a
+        # dashboard status change) run in a follow-up round, once per tick.
+        # Returns the tasks that ran.
+        ran = set()
+        while True:
+            now = int(time.time())
+            due = [task for task in self.tasks if task.due(now) and task not in ran]
+            if not due:
+                return ran
+            ran.update(due)
+            await asyncio.gather(*(self.run(task, now, jitter=True) for task in due))
+
+    async def run(self, task, now, jitter=False):
+        # One fetch per task at a time: an on-demand fetch and a scheduled one
+        # can overlap, and the second has nothing to add.
+        if task.running:
+            return
+        task.running = True
+        try:
+            if jitter:
+                # Don't send a tick's requests in the same instant.
+                await asyncio.sleep(random.uniform(0, TASK_JITTER))
+            await self._run(task, now)
+        finally:
+            task.running = False
+
+    async def _run(self, task, now):
+        deferred = None
+        async with self.semaphore:
+            try:
+                async with async_timeout.timeout(self.timeout):
                     await task.callback()
-                    task.error_count = 0
-                except Exception as e:
-                    task.error_count = task.error_count + 1
-                    logger.error(f"Error #{task.error_count} running task {task.callback.__name__}\n{traceback.format_exc()}\n")
-
-                # If the error count is 1, we're going to try again next tick
-                if task.error_count != 1:
-                    task.next_tick = now + task.interval
+                task.error_count = 0
+                task.last_tick = now
+            except SpaNetBackoff as e:
+                # Shed by the client (open circuit, Retry-After); not an error.
+                deferred = e.retry_after
+                logger.debug("Task %s deferred: %s", task.callback.__name__, e)
+            except Exception as e:
+                task.error_count = task.error_count + 1
+                logger.error("Error #%d running task %s", task.error_count, task.callback.__name__, exc_info=True)
+                if self.on_error is not None:
+                    self.on_error(task)
+
+        if deferred is not None:
+            task.next_tick = now + math.ceil(deferred)
+        # If the error count is 1, we're going to try again next tick
+        elif task.error_count != 1:
+            task.next_tick = task.next_after(now, self.phase)
@@ -23,7 +23,7 @@ async def async_setup_entry(
 
     entities = []
 
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
 
         entities.append(SpaSelect(coordinator, "Operation Mode", SK_OPERATION_MODE, OPERATION_MODES[1:], coordinator.set_operation_mode))
         entities.append(SpaSelect(coordinator, "Power Save", SK_POWER_SAVE, POWER_SAVE[1:], coordinator.set_power_save))
@@ -31,8 +31,8 @@ async def async_setup_entry(
         if config_entry.options.get(OPT_ENABLE_HEAT_PUMP, False):
             entities.append(SpaSelect(coordinator, "Heat Pump", SK_HEAT_PUMP, HEAT_PUMP, coordinator.set_heat_pump))
 
-        for k, v in coordinator.get_state(SK_PUMPS).items():
-            if v["hasSwitch"] and v["speeds"] > 1:
+        for k, v in coordinator.state.get(SK_PUMPS, {}).items():
+            if v.hasSwitch and v.speeds > 1:
                 entities.append(SpaSelect(coordinator, f"Pump {k}", f"pumps.{k}", pumpOptions, coordinator.set_pump))
 
         if SK_FILT_INTERVAL in coordinator.state:
@@ -48,11 +48,12 @@ class SpaSelect(SpaEntity, SelectEntity):
     """A selector"""
 
     def __init__(self, coordinator, name, state_key, options, setter, sub_key=None) -> None:
-        super().__init__(coordinator, "select", name)
+        super().__init__(coordinator, "select", name, (state_key if sub_key is None else f"{state_key}.{sub_key}",))
         self.hass = coordinator.hass
         self._state_key = state_key
         self._options = options
         self._sub_key = sub_key
+        self._value = coordinator.accessor(state_key, sub_key)
 
         sig = inspect.signature(setter)
 
@@ -61,7 +62,7 @@ class SpaSelect(SpaEntity, SelectEntity):
 
     @property
     def current_option(self):
-        return self.coordinator.get_state(self._state_key, self._sub_key)
+        return self._value()
 
     @property
     def options(self):
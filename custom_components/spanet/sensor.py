@@ -5,9 +5,9 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
     BinarySensorDeviceClass,
 )
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfInformation, UnitOfTemperature, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -22,20 +22,42 @@ async def async_setup_entry(
 ) -> bool:
     entities = []
 
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
         entities += [
             SpaTemperatureSensor(coordinator, "Water Temperature", SK_WATERTEMP),
             SpaTemperatureSensor(coordinator, "Set Temperature", SK_SETTEMP),
+            SpaHeatingRateSensor(coordinator, "Heating Rate"),
+            SpaHeatingTimeSensor(coordinator, "Time To Set Temperature"),
             SpaBinarySensor(coordinator, "Heater", SK_HEATER),
             SpaBinarySensor(coordinator, "Sanitise", SK_SANITISE),
             SpaBinarySensor(coordinator, "Sleeping", SK_SLEEPING),
             SpaBinarySensor(coordinator, "Filtering", SK_FILTERING),
         ]
 
-        for k, v in coordinator.get_state(SK_PUMPS).items():
-            if not v["hasSwitch"]:
+        for k, v in coordinator.state.get(SK_PUMPS, {}).items():
+            if not v.hasSwitch:
                 entities.append(SpaBinarySensor(coordinator, f"Pump {k}", f"pumps.{k}.state"))
 
+        entities += [
+            SpaEnergySensor(coordinator, "Heater Energy", "heater"),
+            SpaEnergySensor(coordinator, "Filtration Energy", "filtration"),
+        ]
+        entities += [
+            SpaEnergySensor(coordinator, f"Pump {k} Energy", f"pump_{k}")
+            for k in coordinator.state.get(SK_PUMPS, {})
+        ]
+        if coordinator.state.get(SK_BLOWER) is not None:
+            entities.append(SpaEnergySensor(coordinator, "Blower Energy", "blower"))
+
+        entities += [
+            SpaRequestCountSensor(coordinator, "API Requests"),
+            SpaRequestFailureSensor(coordinator, "API Failed Requests"),
+            SpaRequestBytesSensor(coordinator, "API Data Received"),
+            SpaRequestLatencySensor(coordinator, "API Latency p95"),
+            SpaTokenRefreshSensor(coordinator, "API Token Refreshes"),
+            SpaBurstinessSensor(coordinator, "API Burstiness"),
+        ]
+
     async_add_entity(entities)
 
 
@@ -43,9 +65,10 @@ class SpaSensor(SpaEntity):
     """A sensor"""
 
     def __init__(self, coordinator, name, status_id) -> None:
-        super().__init__(coordinator, "sensor", name)
+        super().__init__(coordinator, "sensor", name, (status_id,))
         self.hass = coordinator.hass
         self._status_id = status_id
+        self._value = coordinator.accessor(status_id)
 
 
 class SpaTemperatureSensor(SpaSensor, SensorEntity):
@@ -56,12 +79,70 @@ class SpaTemperatureSensor(SpaSensor, SensorEntity):
 
     @property
     def native_value(self):
-        value = self.coordinator.get_state(self._status_id)
+        value = self._value()
         if not value:
             return None
         return int(value) / 10
 
 
+class SpaHistorySensor(SpaEntity, SensorEntity):
+    """Derived from the coordinator's recent temperature history."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, name) -> None:
+        super().__init__(coordinator, "sensor", name, (SK_WATERTEMP, SK_SETTEMP, SK_HEATER))
+        self._history = coordinator.history
+
+
+class SpaHeatingRateSensor(SpaHistorySensor):
+    _attr_icon = "mdi:thermometer-chevron-up"
+    _attr_native_unit_of_measurement = f"{UnitOfTemperature.CELSIUS}/h"
+
+    @property
+    def native_value(self):
+        return self._history.heating_rate()
+
+
+class SpaHeatingTimeSensor(SpaHistorySensor):
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MINUTES
+
+    @property
+    def native_value(self):
+        return self._history.time_to_target()
+
+
+class SpaEnergySensor(SpaEntity, SensorEntity):
+    """Estimated energy from a heater/pump/blower's on-time and its rating."""
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = 2
+
+    def __init__(self, coordinator, name, counter) -> None:
+        # No state keys: the counters live outside the state, and the
+        # coordinator bumps its activity when they advance.
+        super().__init__(coordinator, "sensor", name)
+        self._counter = counter
+
+    @property
+    def native_value(self):
+        counter = self.coordinator.duty.get(self._counter)
+        return None if counter is None else round(counter.energy, 3)
+
+    @property
+    def extra_state_attributes(self):
+        counter = self.coordinator.duty.get(self._counter)
+        if counter is None:
+            return None
+        return {
+            "on_time_today_minutes": round(counter.seconds_today / 60),
+            "on_time_total_hours": round(counter.seconds / 3600, 2),
+        }
+
+
 class SpaBinarySensor(SpaSensor, BinarySensorEntity):
     """A binary sensor"""
 
@@ -69,7 +150,7 @@ class SpaBinarySensor(SpaSensor, BinarySensorEntity):
 
     @property
     def is_on(self):
-        value = self.coordinator.get_state(self._status_id)
+        value = self._value()
         if value is None:
             return None
         if value == "on":
@@ -79,3 +160,132 @@ class SpaBinarySensor(SpaSensor, BinarySensorEntity):
         if value == "auto":
             return False
         return int(value) == 1
+
+
+class SpaMetricsSensor(SpaEntity, SensorEntity):
+    """Request metrics for one spa, collected by the SpaNET client.
+
+    Disabled by default; enable them to see what polling actually costs.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator, name) -> None:
+        # No state keys: metrics live outside the state, and while a metrics
+        # sensor is added the coordinator bumps its activity whenever a poll
+        # sends requests.
+        super().__init__(coordinator, "sensor", name)
+        self._metrics = coordinator.spanet.metrics
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.watch_metrics())
+
+    @property
+    def _total(self):
+        return self._metrics.spa_total(self.coordinator.spa_id)
+
+
+class SpaRequestCountSensor(SpaMetricsSensor):
+    _attr_icon = "mdi:counter"
+
+    @property
+    def native_value(self):
+        return self._total.requests
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            name: endpoint.requests
+            for name, endpoint in self._metrics.for_spa(self.coordinator.spa_id).items()
+        }
+
+
+class SpaRequestFailureSensor(SpaMetricsSensor):
+    _attr_icon = "mdi:alert-circle-outline"
+
+    @property
+    def native_value(self):
+        return self._total.failures
+
+    @property
+    def extra_state_attributes(self):
+        attributes = {str(status): count for status, count in self._total.statuses.items()}
+        attributes["deferred"] = self._total.deferred
+        return attributes
+
+
+class SpaRequestBytesSensor(SpaMetricsSensor):
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+
+    @property
+    def native_value(self):
+        return self._total.bytes
+
+    @property
+    def extra_state_attributes(self):
+        connections = self._metrics.connections
+        total = self._total
+        return {
+            # On the wire, for the responses whose size there is known.
+            "transferred": total.wire_bytes,
+            "compression_ratio": round(total.wire_bytes / total.measured_bytes, 2) if total.measured_bytes else None,
+            "unmeasured_responses": total.unmeasured,
+            "connections_opened": connections.opened,
+            "connections_reused": connections.reused,
+            "connect_p95": connections.connect.percentile(95),
+        }
+
+
+class SpaRequestLatencySensor(SpaMetricsSensor):
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        return self._total.latency.percentile(95)
+
+    @property
+    def extra_state_attributes(self):
+        latency = self._total.latency
+        return {
+            "p50": latency.percentile(50),
+            "p99": latency.percentile(99),
+            "endpoints_p95": {
+                name: endpoint.latency.percentile(95)
+                for name, endpoint in self._metrics.for_spa(self.coordinator.spa_id).items()
+            },
+        }
+
+
+class SpaTokenRefreshSensor(SpaMetricsSensor):
+    """Token refreshes for the whole account the spa belongs to."""
+
+    _attr_icon = "mdi:key-change"
+
+    @property
+    def native_value(self):
+        return self._metrics.token_refreshes
+
+
+class SpaBurstinessSensor(SpaMetricsSensor):
+    """Peak-to-mean request rate over the last 10 minutes, for the whole account.
+
+    Close to 1 when polls are spread evenly; high when they arrive in bursts.
+    """
+
+    _attr_icon = "mdi:chart-bell-curve"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        return self._metrics.timeline.burstiness()
+
+    @property
+    def extra_state_attributes(self):
+        timeline = self._metrics.timeline.as_dict()
+        return {"requests": timeline["requests"], "peak": timeline["peak"], "bin_seconds": timeline["bin_seconds"]}
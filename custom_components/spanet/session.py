@@ -0,0 +1,78 @@
+"""A dedicated aiohttp session for one SpaNET account.
+
+Home Assistant's shared session has generic connector limits and keeps idle
+connections for 15s, so a poll every minute opens a new TLS connection each
+time. This session keeps connections to the cloud alive across polls, caches
+DNS, sizes its pool for the account's spas, asks for compressed responses and
+times out each request well inside the scheduler's per-task timeout. A trace
+config feeds connection setup times into the account's RequestMetrics.
+"""
+import importlib.util
+import time
+
+import aiohttp
+
+# aiohttp decodes br responses when either brotli package is installed.
+HAS_BROTLI = any(importlib.util.find_spec(name) for name in ("brotli", "brotlicffi"))
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
+# Longer than the coordinator's 60s tick, so a poll reuses the last one's
+# connection.
+KEEPALIVE_TIMEOUT = 75
+DNS_CACHE_TTL = 600
+# Connections per spa default to its scheduler's default concurrency; one more
+# is kept for logins, token refreshes and commands.
+POOL_PER_SPA = 3
+POOL_MAX = 30
+
+# GETs are retried inside the scheduler's 10s task timeout, so a single
+# attempt has to give up sooner.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=8, connect=4, sock_read=6)
+
+
+def pool_size(spas: int, per_spa: int = POOL_PER_SPA):
+    return min(POOL_MAX, max(spas, 1) * per_spa + 1)
+
+
+def connection_trace(metrics):
+    """TraceConfig recording DNS lookups, new connections and reuse in metrics.connections."""
+
+    async def on_dns_start(session, context, params):
+        context.dns_start = time.monotonic()
+
+    async def on_dns_end(session, context, params):
+        metrics.connections.dns((time.monotonic() - context.dns_start) * 1000)
+
+    async def on_create_start(session, context, params):
+        context.connect_start = time.monotonic()
+
+    async def on_create_end(session, context, params):
+        metrics.connections.created((time.monotonic() - context.connect_start) * 1000)
+
+    async def on_reuse(session, context, params):
+        metrics.connections.reused += 1
+
+    trace = aiohttp.TraceConfig()
+    trace.on_dns_resolvehost_start.append(on_dns_start)
+    trace.on_dns_resolvehost_end.append(on_dns_end)
+    trace.on_connection_create_start.append(on_create_start)
+    trace.on_connection_create_end.append(on_create_end)
+    trace.on_connection_reuseconn.append(on_reuse)
+    return trace
+
+
+def create_session(metrics, limit: int = None, ssl_context=None):
+    limit = limit or pool_size(1)
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=ssl_context if ssl_context is not None else True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=REQUEST_TIMEOUT,
+        headers={"Accept-Encoding": ACCEPT_ENCODING},
+        trace_configs=[connection_trace(metrics)],
+    )
@@ -2,15 +2,52 @@
 
 Based on https://github.com/BlaT2512/spanet-api/issues/4
 """
+import asyncio
+import hashlib
 import logging
-import json
 import jwt
+import random
 import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from . import codec
+from .governor import RequestGovernor, ENDPOINT_PRIORITIES, PRIORITY_COMMAND, PRIORITY_INITIAL, PRIORITY_SETTINGS
+from .metrics import RequestMetrics
+from .session import REQUEST_TIMEOUT, create_session
+from .trace import Tracer
 
 logger = logging.getLogger(__name__)
+auth_trace = Tracer("auth")
+# Every request is a lot of lines at debug; keep one in ten.
+http_trace = Tracer("http", sample=0.1)
 
 BASE_URL = "https://app.spanet.net.au/api"
 
+# Returned by HttpClient.get(..., skip_unchanged=True) when the endpoint's
+# payload is identical to the last one fetched.
+UNCHANGED = object()
+
+# GETs are retried on 5xx, 429 and connection errors with full-jitter
+# exponential backoff; the whole sequence has to fit in the scheduler's 10s
+# per-task timeout. Each attempt gets what's left of GET_BUDGET, and no retry
+# starts with less than GET_ATTEMPT_MIN seconds to go.
+GET_ATTEMPTS = 3
+GET_BUDGET = 9
+GET_ATTEMPT_MIN = 2
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4
+
+# Statuses with which /OAuth/Token rejects a refresh token.
+REFRESH_REJECTED = (400, 401, 403)
+
+# Consecutive failures before an endpoint family's circuit opens, and how long
+# it stays open (doubling while probes keep failing, up to the max).
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 30
+BREAKER_MAX_OPEN = 600
+
 class SpaNetException(Exception):
     """Base SpaNet Exception"""
 
@@ -29,6 +66,23 @@ class SpaNetApiError(SpaNetException):
         self.response = response
         super().__init__(f"API Error {response.status}: {body}")
 
+class SpaNetBackoff(SpaNetException):
+    """Request not sent; try again in retry_after seconds"""
+    def __init__(self, message, retry_after):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class SpaNetCircuitOpen(SpaNetBackoff):
+    """Endpoint family is failing; requests are shed until the circuit closes"""
+    def __init__(self, family, retry_after):
+        super().__init__(f"Circuit open for /{family}, retry in {retry_after:.0f}s", retry_after)
+
+
+class SpaNetRequestDeferred(SpaNetBackoff):
+    """Account request budget is reserved for higher priority requests"""
+
+
 class SpaNetResponseError(SpaNetException):
     """SpaNet response error"""
     def __init__(self, response, message):
@@ -41,6 +95,10 @@ class SpaPool:
         self.config = config
         self.client = client
         self.pumps = {}
+        # Endpoint (getter) name -> path, for every endpoint fetched.
+        self.paths = {}
+        # Paths fetched successfully at least once.
+        self.fetched = set()
 
     @property
     def id(self):
@@ -50,14 +108,33 @@ class SpaPool:
     def name(self):
         return self.config["name"]
 
-    async def get_dashboard(self):
-        return await self.client.get("/Dashboard/" + self.id)
+    async def get(self, name, path, budget=GET_BUDGET):
+        self.paths[name] = path
+        if path in self.fetched:
+            priority = ENDPOINT_PRIORITIES.get(name, PRIORITY_SETTINGS)
+        else:
+            priority = PRIORITY_INITIAL
+        data = await self.client.get(path, skip_unchanged=True, tag=(self.id, name), priority=priority, budget=budget)
+        self.fetched.add(path)
+        return data
+
+    async def put(self, name, path, payload):
+        return await self.client.put(path, payload, tag=(self.id, name), priority=PRIORITY_COMMAND)
+
+    def invalidate(self, *names):
+        """Forget payload fingerprints so the next fetch of the named endpoints
+        (all of them by default) is parsed."""
+        names = names or self.paths
+        self.client.invalidate(*(self.paths[name] for name in names if name in self.paths))
+
+    async def get_dashboard(self, budget=GET_BUDGET):
+        return await self.get("get_dashboard", "/Dashboard/" + self.id, budget)
 
     async def get_information(self):
-        return await self.client.get("/Information/" + self.id)
+        return await self.get("get_information", "/Information/" + self.id)
 
     async def get_pumps(self):
-        return await self.client.get("/PumpsAndBlower/Get/" + self.id)
+        return await self.get("get_pumps", "/PumpsAndBlower/Get/" + self.id)
 
     async def set_pump(self, pump_id:str, state:str):
         modeId = 0
@@ -66,9 +143,9 @@ class SpaPool:
         elif state == "off":
             modeId = 2
         else:
-            logger.warning(f"Unknown modeId for pump state {state}")
+            logger.warning("Unknown modeId for pump state %s", state)
             return
-        return await self.client.put(f"/PumpsAndBlower/SetPump/" + pump_id, {
+        return await self.put("set_pump", f"/PumpsAndBlower/SetPump/" + pump_id, {
             "deviceId": self.id,
             "modeId": modeId,
             "pumpVariableSpeed": 0
@@ -76,89 +153,98 @@ class SpaPool:
 
     async def set_blower(self, blower_id: str, mode_id: int, speed: int = 0):
         # SpaNet blower modeId: 1 = off, 2 = variable (speed 1-5), 3 = ramp.
-        return await self.client.put(f"/PumpsAndBlower/SetBlower/" + blower_id, {
+        return await self.put("set_blower", f"/PumpsAndBlower/SetBlower/" + blower_id, {
             "deviceId": self.id,
             "modeId": mode_id,
             "speed": speed
         })
 
     async def set_temperature(self, temp: int):
-        return await self.client.put("/Dashboard/" + self.config["id"], {"temperature": temp})
+        return await self.put("set_temperature", "/Dashboard/" + self.config["id"], {"temperature": temp})
 
     async def set_sanitise(self, on: bool):
         # Start (True) or cancel (False) the one-touch sanitise / clean cycle.
-        return await self.client.put("/Settings/SanitiseStatus/" + self.id, {"on": on})
+        return await self.put("set_sanitise", "/Settings/SanitiseStatus/" + self.id, {"on": on})
 
     async def get_operation_mode(self):
-        return await self.client.get("/Settings/OperationMode/" + self.id)
+        return await self.get("get_operation_mode", "/Settings/OperationMode/" + self.id)
 
     async def set_operation_mode(self, mode: int):
-        return await self.client.put("/Settings/OperationMode/" + self.id, { "mode": mode })
+        return await self.put("set_operation_mode", "/Settings/OperationMode/" + self.id, { "mode": mode })
 
     async def get_power_save(self):
-        return await self.client.get("/Settings/PowerSave/" + self.id)
+        return await self.get("get_power_save", "/Settings/PowerSave/" + self.id)
 
     async def set_power_save(self, mode: int):
-        return await self.client.put("/Settings/PowerSave/" + self.id, { "mode": mode })
+        return await self.put("set_power_save", "/Settings/PowerSave/" + self.id, { "mode": mode })
 
     async def get_sleep_timer(self, index:int):
-        return await self.client.get("/SleepTimers/" + self.id)
+        return await self.get("get_sleep_timer", "/SleepTimers/" + self.id)
 
     async def set_sleep_timer(self, timer_id: int, timer_number: int, enabled: int):
-        return await self.client.put("/SleepTimers/" + str(timer_id), { "deviceId": self.id, "timerNumber": timer_number, "enabled": enabled == 1 })
+        return await self.put("set_sleep_timer", "/SleepTimers/" + str(timer_id), { "deviceId": self.id, "timerNumber": timer_number, "enabled": enabled == 1 })
 
     async def set_heat_pump(self, mode: int):
-        return await self.client.put("/Settings/SetHeatPumpMode/" + self.id, { "mode": mode + 1 })
+        return await self.put("set_heat_pump", "/Settings/SetHeatPumpMode/" + self.id, { "mode": mode + 1 })
 
     async def set_element_boost(self, on: int):
-        return await self.client.put("/Settings/SetElementBoost/" + self.id, { "svElementBoost": on == 1 })
+        return await self.put("set_element_boost", "/Settings/SetElementBoost/" + self.id, { "svElementBoost": on == 1 })
 
     async def get_filtration(self):
-        return await self.client.get("/Settings/Filtration/" + self.id)
+        return await self.get("get_filtration", "/Settings/Filtration/" + self.id)
 
     async def set_filtration(self, field: str, value: int):
         # field is "totalRuntime" (hours) or "inBetweenCycles" (hours between cycles)
-        return await self.client.put("/Settings/Filtration/" + self.id, { field: value })
+        return await self.put("set_filtration", "/Settings/Filtration/" + self.id, { field: value })
 
     async def get_settings_details(self):
-        return await self.client.get("/Settings/GetSettingsDetails?deviceId=" + self.id)
+        return await self.get("get_settings_details", "/Settings/GetSettingsDetails?deviceId=" + self.id)
 
     async def set_timeout(self, minutes: int):
-        return await self.client.put("/Settings/Timeout/" + self.id, { "timeout": minutes })
+        return await self.put("set_timeout", "/Settings/Timeout/" + self.id, { "timeout": minutes })
 
     async def set_lock(self, lock_mode: int):
-        return await self.client.put("/Settings/Lock/" + self.id, { "lockMode": lock_mode })
+        return await self.put("set_lock", "/Settings/Lock/" + self.id, { "lockMode": lock_mode })
 
     async def set_sanitise_time(self, time_str: str):
-        return await self.client.put("/Settings/Sanitise/" + self.id, { "time": time_str })
+        return await self.put("set_sanitise_time", "/Settings/Sanitise/" + self.id, { "time": time_str })
 
     async def get_light_details(self):
-        return await self.client.get("/Lights/GetLightDetails/" + self.id)
+        return await self.get("get_light_details", "/Lights/GetLightDetails/" + self.id)
 
     async def set_light_status(self, light_id: int, on: int):
-        return await self.client.put("/Lights/SetLightStatus/" + str(light_id), { "deviceId": self.id, "on": on == 1 })
+        return await self.put("set_light_status", "/Lights/SetLightStatus/" + str(light_id), { "deviceId": self.id, "on": on == 1 })
 
     async def set_light_brightness(self, light_id: int, brightness: int):
-        return await self.client.put("/Lights/SetLightBrightness/" + str(light_id), { "deviceId": self.id, "brightness": brightness })
+        return await self.put("set_light_brightness", "/Lights/SetLightBrightness/" + str(light_id), { "deviceId": self.id, "brightness": brightness })
 
     async def set_light_colour(self, light_id: int, colour: str):
-        return await self.client.put("/Lights/SetLightColour/" + str(light_id), { "deviceId": self.id, "colour": colour })
+        return await self.put("set_light_colour", "/Lights/SetLightColour/" + str(light_id), { "deviceId": self.id, "colour": colour })
 
     async def set_light_mode(self, light_id: int, mode: str):
-        return await self.client.put("/Lights/SetLightMode/" + str(light_id), { "deviceId": self.id, "mode": mode })
+        return await self.put("set_light_mode", "/Lights/SetLightMode/" + str(light_id), { "deviceId": self.id, "mode": mode })
 
     async def set_light_speed(self, light_id: int, speed: int):
-        return await self.client.put("/Lights/SetLightSpeed/" + str(light_id), { "deviceId": self.id, "speed": speed })
+        return await self.put("set_light_speed", "/Lights/SetLightSpeed/" + str(light_id), { "deviceId": self.id, "speed": speed })
 
 
 class SpaNet:
-    def __init__(self, aio_session):
-        self.session = aio_session
+    def __init__(self, aio_session=None, base_url=BASE_URL, pool_size=None, ssl_context=None):
+        """Without aio_session, the client opens (and closes) its own, see session.py."""
+        self.metrics = RequestMetrics()
+        self.owns_session = aio_session is None
+        self.session = create_session(self.metrics, pool_size, ssl_context) if self.owns_session else aio_session
+        self.base_url = base_url
         self.spa_configs = {}
         self.spa_sockets = {}
         self.session_info = None
         self.client = None
         self.auth_token = {}
+        self.token_source = None
+        # Shared by every spa on the account; login and token refreshes bypass it.
+        self.governor = RequestGovernor()
+        # Called whenever the tokens change, so they can be persisted.
+        self.on_session_update = None
 
     async def authenticate(self, email, password, device_id):
         login_params = {
@@ -168,17 +254,21 @@ class SpaNet:
             "language": "en_AU"
         }
 
-        client = HttpClient(self.session)
+        client = HttpClient(self.session, base_url=self.base_url, metrics=self.metrics)
         try:
-            login_data = await client.post("/Login/Authenticate", login_params)
+            login_data = await client.post("/Login/Authenticate", login_params, tag=(None, "authenticate"))
             if "access_token" not in login_data:
                 raise SpaNetAuthFailed()
         except Exception as e:
             raise SpaNetAuthFailed(e)
 
-        self.token_source = TokenSource(client, login_data, device_id)
-        self.client = HttpClient(self.session, self.token_source)
-        device_data = await self.client.get("/Devices")
+        self.token_source = TokenSource(client, login_data, device_id, self.session_updated)
+        self.client = HttpClient(self.session, self.token_source, self.base_url, self.metrics, self.governor)
+        await self.refresh_spas()
+
+    async def refresh_spas(self):
+        """Fetch the account's spas from /Devices; returns whether they changed."""
+        device_data = await self.client.get("/Devices", tag=(None, "devices"))
 
         spa_configs = []
         for config in device_data["devices"]:
@@ -189,7 +279,53 @@ class SpaNet:
                     "macAddress": config["macAddress"],
                 }
             )
+        changed = spa_configs != self.spa_configs
         self.spa_configs = spa_configs
+        self.session_updated()
+        return changed
+
+    async def resume(self, saved):
+        """Restore a session saved by export_session without a password login.
+
+        The access token is refreshed if it has expired; SpaNetAuthFailed is
+        raised when the API rejects the refresh token. Any other error (5xx,
+        429, connection failures) propagates: the saved session may well be
+        fine once the cloud recovers. The saved spa list is used as is; call
+        refresh_spas to pick up changes to the account.
+        """
+        client = HttpClient(self.session, base_url=self.base_url, metrics=self.metrics)
+        token_source = TokenSource(client, {
+            "access_token": saved["access_token"],
+            "refresh_token": saved["refresh_token"],
+        }, saved["device_id"], self.session_updated)
+        try:
+            await token_source.token()
+        except SpaNetApiError as e:
+            if e.response.status in REFRESH_REJECTED:
+                raise SpaNetAuthFailed(e)
+            raise
+
+        self.token_source = token_source
+        self.client = HttpClient(self.session, self.token_source, self.base_url, self.metrics, self.governor)
+        self.spa_configs = saved["spas"]
+
+    def export_session(self):
+        token_data = self.token_source.token_data
+        return {
+            "access_token": token_data["access_token"],
+            "refresh_token": token_data["refresh_token"],
+            "expires_at": token_data["expires_at"],
+            "device_id": token_data["device_id"],
+            "spas": self.spa_configs,
+        }
+
+    async def close(self):
+        if self.owns_session:
+            await self.session.close()
+
+    def session_updated(self):
+        if self.on_session_update and self.spa_configs:
+            self.on_session_update()
 
     def get_available_spas(self):
         """Get a list of spas"""
@@ -208,21 +344,151 @@ class SpaNet:
         return SpaPool(spa_config, self.client)
 
 class HttpClient:
-    def __init__(self, session, token_source=None):
+    def __init__(self, session, token_source=None, base_url=BASE_URL, metrics=None, governor=None):
         self.session = session
         self.token_source = token_source
-
-    async def post(self, path, payload):
-        response = await self.session.post(BASE_URL + path, data=json.dumps(payload), headers=await self.build_headers())
+        self.base_url = base_url
+        self.metrics = metrics or RequestMetrics()
+        self.governor = governor
+        self.fingerprints = {}
+        self.breakers = {}
+
+    def breaker(self, path):
+        # Endpoint family: the first path segment, e.g. "Settings" or "Lights".
+        family = path.split("?")[0].split("/")[1]
+        breaker = self.breakers.get(family)
+        if breaker is None:
+            breaker = self.breakers[family] = CircuitBreaker(family)
+        return breaker
+
+    async def request(self, method, path, tag=None, priority=None, **kwargs):
+        """Send a request, recording its status, size and latency under tag.
+
+        The body is read here so the latency covers the whole transfer; later
+        .json()/.text() calls use aiohttp's cached copy. Raises
+        SpaNetCircuitOpen without sending while the endpoint family's circuit
+        is open.
+
+        With a governor, a request with a priority takes a token from the
+        account's budget first: commands wait for one, anything else raises
+        SpaNetRequestDeferred when the budget is reserved for higher classes.
+        """
+        breaker = self.breaker(path)
+        breaker.check()
+        if self.governor is not None and priority is not None:
+            try:
+                await self.reserve(priority, tag or (None, path))
+            except BaseException:
+                # Deferred or cancelled before sending: if this was the
+                # half-open probe, let the next request probe instead.
+                breaker.release()
+                raise
+        start = time.monotonic()
+        status = None
+        size = 0
+        wire_size = None
+        try:
+            response = await self.session.request(method, self.base_url + path, **kwargs)
+            status = response.status
+            size = len(await response.read())
+            # Content-Length is the encoded size when the body was compressed;
+            # a chunked compressed body's wire size isn't known.
+            wire_size = response.content_length
+            if wire_size is None and "Content-Encoding" not in response.headers:
+                wire_size = size
+        except asyncio.CancelledError:
+            # Cut short by the caller (e.g. the scheduler's task timeout),
+            # which says nothing about the endpoint.
+            breaker.release()
+            raise
+        except BaseException:
+            breaker.failure()
+            raise
+        finally:
+            elapsed = (time.monotonic() - start) * 1000
+            self.metrics.record(tag or (None, path), status, elapsed, size, wire_size)
+            http_trace.debug(method, path=path, status=status, ms=round(elapsed), bytes=size, wire_bytes=wire_size)
+
+        if status == 429:
+            breaker.failure(retry_after(response))
+        elif status >= 500:
+            breaker.failure()
+        else:
+            breaker.success()
+        return response
+
+    async def reserve(self, priority, tag):
+        while wait := self.governor.reserve(priority):
+            if priority != PRIORITY_COMMAND:
+                self.metrics.defer(tag)
+                raise SpaNetRequestDeferred(f"Request budget low, deferring {tag[1]}", wait)
+            logger.debug("Request budget exhausted, %s waiting %.1fs", tag[1], wait)
+            await asyncio.sleep(wait)
+
+    async def post(self, path, payload, tag=None):
+        response = await self.request("POST", path, tag, data=codec.dumps(payload), headers=await self.build_headers())
         return await self.check_response(response)
 
-    async def put(self, path, payload):
-        response = await self.session.put(BASE_URL + path, data=json.dumps(payload), headers=await self.build_headers())
+    async def put(self, path, payload, tag=None, priority=None):
+        response = await self.request("PUT", path, tag, priority, data=codec.dumps(payload), headers=await self.build_headers())
         return await self.check_response(response)
 
-    async def get(self, path):
-        response = await self.session.get(BASE_URL + path, headers=await self.build_headers())
-        return await self.check_response(response, True)
+    async def get(self, path, skip_unchanged=False, tag=None, priority=None, budget=GET_BUDGET):
+        """GET a JSON endpoint, retrying transient failures within budget seconds.
+
+        With skip_unchanged, the last ETag and a digest of the last body are kept
+        per path, and UNCHANGED is returned (without parsing) when the server
+        answers 304 or sends back the same bytes.
+        """
+        deadline = time.monotonic() + budget
+        for attempt in range(GET_ATTEMPTS):
+            timeout = aiohttp.ClientTimeout(
+                total=min(REQUEST_TIMEOUT.total, deadline - time.monotonic()),
+                connect=REQUEST_TIMEOUT.connect,
+                sock_read=REQUEST_TIMEOUT.sock_read,
+            )
+            try:
+                return await self.get_once(path, skip_unchanged, tag, priority, timeout)
+            except SpaNetApiError as e:
+                status = e.response.status
+                if attempt + 1 == GET_ATTEMPTS or not (status == 429 or status >= 500):
+                    raise
+                delay = retry_after(e.response) if status == 429 else None
+                if delay is None:
+                    delay = retry_backoff(attempt)
+                if delay > RETRY_MAX_DELAY or deadline - time.monotonic() - delay < GET_ATTEMPT_MIN:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                delay = retry_backoff(attempt)
+                if attempt + 1 == GET_ATTEMPTS or deadline - time.monotonic() - delay < GET_ATTEMPT_MIN:
+                    raise
+
+            logger.debug("Retrying GET %s in %.1fs (attempt %d)", path, delay, attempt + 2)
+            await asyncio.sleep(delay)
+
+    async def get_once(self, path, skip_unchanged=False, tag=None, priority=None, timeout=REQUEST_TIMEOUT):
+        headers = await self.build_headers()
+        fingerprint = self.fingerprints.get(path) if skip_unchanged else None
+        if fingerprint and fingerprint[0]:
+            headers["If-None-Match"] = fingerprint[0]
+
+        response = await self.request("GET", path, tag, priority, headers=headers, timeout=timeout)
+        if not skip_unchanged:
+            return await self.check_response(response, True)
+        if fingerprint and response.status == 304:
+            return UNCHANGED
+
+        digest = hashlib.blake2b(await response.read(), digest_size=16).digest()
+        if fingerprint and fingerprint[1] == digest and response.status < 300:
+            return UNCHANGED
+
+        data = await self.check_response(response, True)
+        self.fingerprints[path] = (response.headers.get("ETag"), digest)
+        return data
+
+    def invalidate(self, *paths):
+        for path in paths:
+            self.fingerprints.pop(path, None)
 
     async def build_headers(self):
         headers = {
@@ -243,7 +509,7 @@ class HttpClient:
             await self.raise_api_error(response)
 
         if is_json:
-            data = await response.json()
+            data = codec.loads(await response.read())
             if not isinstance(data, dict):
                 raise SpaNetResponseError(f"Request to {response.url} received unexpected {type(data).__name__} response: {data}")
             return data
@@ -254,10 +520,80 @@ class HttpClient:
         body = await response.text()
         raise SpaNetApiError(response, body)
 
+def retry_backoff(attempt):
+    """Full-jitter exponential backoff before retry attempt + 1."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def retry_after(response):
+    """Seconds from a Retry-After header (delta or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Fails fast for an endpoint family that keeps failing.
+
+    After BREAKER_THRESHOLD consecutive failures (or a 429 with Retry-After)
+    the circuit opens and requests raise SpaNetCircuitOpen without being sent.
+    Once the open period passes a single probe request is let through; success
+    closes the circuit, failure opens it again for twice as long.
+    """
+
+    def __init__(self, family):
+        self.family = family
+        self.failures = 0
+        self.open_until = 0
+        self.probing = False
+
+    def check(self):
+        now = time.monotonic()
+        if now < self.open_until:
+            raise SpaNetCircuitOpen(self.family, self.open_until - now)
+        if self.failures >= BREAKER_THRESHOLD:
+            if self.probing:
+                raise SpaNetCircuitOpen(self.family, 1)
+            self.probing = True
+
+    def release(self):
+        """A request that passed check() was never sent, or was cancelled."""
+        self.probing = False
+
+    def success(self):
+        if self.failures >= BREAKER_THRESHOLD:
+            logger.info("SpaNET /%s recovered, closing circuit", self.family)
+        self.failures = 0
+        self.probing = False
+
+    def failure(self, retry_after=None):
+        self.failures += 1
+        self.probing = False
+        now = time.monotonic()
+        if retry_after is not None:
+            self.open_until = max(self.open_until, now + retry_after)
+        elif self.failures >= BREAKER_THRESHOLD:
+            period = min(BREAKER_MAX_OPEN, BREAKER_RESET * 2 ** (self.failures - BREAKER_THRESHOLD))
+            self.open_until = now + period
+            if self.failures == BREAKER_THRESHOLD:
+                logger.warning("SpaNET /%s failing, pausing requests for %ds", self.family, period)
+
+
 class TokenSource:
-    def __init__(self, client, token, device_id):
+    def __init__(self, client, token, device_id, on_update=None):
         self.token_data = {"device_id": device_id}
         self.client = client
+        self.on_update = on_update
+        # Scheduler tasks fetch concurrently; only one of them refreshes.
+        self.lock = asyncio.Lock()
         self.update(token)
 
     def update(self, token):
@@ -266,15 +602,23 @@ class TokenSource:
         self.token_data["expires_at"] = decoded["exp"]
 
     async def token(self):
-        expire_threshold = int(time.time()) - 60
+        async with self.lock:
+            return await self.refresh_if_expired()
+
+    async def refresh_if_expired(self):
+        # Refresh a minute early, so the token can't expire in flight.
+        expire_threshold = int(time.time()) + 60
         if self.token_data["expires_at"] > expire_threshold:
             return self.token_data["access_token"]
 
         response = await self.client.post("/OAuth/Token", {
             "refreshToken": self.token_data["refresh_token"],
             "userDeviceId": self.token_data["device_id"]
-        })
+        }, tag=(None, "refresh_token"))
+        self.client.metrics.token_refreshes += 1
 
         self.update(response)
-        logger.debug(f"Token refreshed {self.token_data}")
+        auth_trace.debug("token refreshed", token_data=self.token_data)
+        if self.on_update:
+            self.on_update()
         return self.token_data["access_token"]
\ No newline at end of file
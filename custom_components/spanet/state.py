@@ -0,0 +1,175 @@
+"""Typed spa state model.
+
+The coordinator's state used to be nested dicts addressed by dotted keys such
+as ``pumps.1.state``. It's now a tree of slotted records, and dotted keys are
+compiled once into attribute/item getters so entity reads don't split strings
+or walk dicts.
+"""
+from operator import attrgetter, itemgetter
+
+from .const import *
+
+
+class StateObject:
+    """A slotted record that still answers the dict calls the entities use.
+
+    Unset slots behave like missing keys: ``"lights" in state`` is False,
+    ``state.get("lights")`` is None and ``state["lights"]`` raises KeyError.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()})"
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        if key in self:
+            delattr(self, key)
+        return value
+
+    def as_dict(self):
+        return {
+            key: _plain(getattr(self, key))
+            for key in self.__slots__
+            if hasattr(self, key)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: value for key, value in data.items() if key in cls.__slots__})
+
+
+def _plain(value):
+    if isinstance(value, StateObject):
+        return value.as_dict()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+class PumpState(StateObject):
+    __slots__ = ("apiId", "auto", "speeds", "hasSwitch", "state")
+
+
+class BlowerState(StateObject):
+    __slots__ = ("apiId", "status", "speed", "hasSwitch")
+
+
+class LightState(StateObject):
+    __slots__ = ("apiId", "state", "mode", "colour", "brightness", "speed")
+
+
+class SleepTimerState(StateObject):
+    __slots__ = ("number", "apiId", "state")
+
+
+class SpaState(StateObject):
+    __slots__ = (
+        SK_SETTEMP,
+        SK_WATERTEMP,
+        "statusList",
+        SK_HEATER,
+        SK_SLEEPING,
+        SK_SANITISE,
+        SK_FILTERING,
+        SK_PUMPS,
+        SK_BLOWER,
+        SK_OPERATION_MODE,
+        SK_POWER_SAVE,
+        SK_HEAT_PUMP,
+        SK_ELEMENT_BOOST,
+        SK_SLEEP_TIMERS,
+        SK_LIGHTS,
+        SK_FILT_RUNTIME,
+        SK_FILT_INTERVAL,
+        SK_TIMEOUT,
+        SK_LOCK,
+        SK_SANITISE_TIME,
+    )
+
+    @classmethod
+    def from_dict(cls, data):
+        state = super().from_dict(data)
+        if SK_PUMPS in state:
+            state.pumps = {k: PumpState.from_dict(v) for k, v in state.pumps.items()}
+        if SK_SLEEP_TIMERS in state:
+            state.sleepTimers = {k: SleepTimerState.from_dict(v) for k, v in state.sleepTimers.items()}
+        if state.get(SK_BLOWER) is not None:
+            state.blower = BlowerState.from_dict(state.blower)
+        if state.get(SK_LIGHTS) is not None:
+            state.lights = LightState.from_dict(state.lights)
+        return state
+
+
+def flatten(value, prefix=""):
+    """Flatten a state tree into {dotted key: leaf value}."""
+    if isinstance(value, StateObject):
+        value = {key: getattr(value, key) for key in value.__slots__ if hasattr(value, key)}
+    if not isinstance(value, dict):
+        return {prefix: value}
+    leaves = {}
+    for key, item in value.items():
+        leaves.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+    return leaves
+
+
+# State fields holding dicts keyed by pump/timer number.
+MAPPING_FIELDS = {SK_PUMPS, SK_SLEEP_TIMERS}
+
+
+def compile_accessor(key: str):
+    """Compile a dotted state key into a function that reads it from a SpaState.
+
+    Runs of attribute names collapse into a single (C-level) attrgetter, and
+    the segment after a mapping field becomes an itemgetter. Missing values
+    raise AttributeError or KeyError.
+    """
+    getters = []
+    attrs = []
+    in_mapping = False
+    for part in key.split("."):
+        if in_mapping:
+            getters.append(attrgetter(".".join(attrs)))
+            getters.append(itemgetter(part))
+            attrs = []
+            in_mapping = False
+        else:
+            attrs.append(part)
+            in_mapping = part in MAPPING_FIELDS
+    if attrs:
+        getters.append(attrgetter(".".join(attrs)))
+
+    if len(getters) == 1:
+        return getters[0]
+
+    def read(state):
+        for getter in getters:
+            state = getter(state)
+        return state
+
+    return read
@@ -0,0 +1,63 @@
+"""Persistent storage for the spanet integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, CONF_BASE_URL
+from .spanet import BASE_URL
+
+STORAGE_VERSION = 1
+AUTH_STORAGE_KEY = f"{DOMAIN}.auth"
+AUTH_SAVE_DELAY = 1
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.snapshot"
+SNAPSHOT_SAVE_DELAY = 60
+
+
+def account_key(data: dict[str, Any]) -> str:
+    """Entries logging in with the same email share one client and session."""
+    email = data["email"].strip().lower()
+    base_url = data.get(CONF_BASE_URL, BASE_URL)
+    return email if base_url == BASE_URL else f"{email} {base_url}"
+
+
+class AuthStore:
+    """Saved SpaNET sessions (tokens, device id and spa list) per account."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.store = Store(hass, STORAGE_VERSION, AUTH_STORAGE_KEY, private=True)
+        self.sessions = {}
+
+    async def async_load(self):
+        data = await self.store.async_load() or {}
+        self.sessions = data.get("sessions", {})
+
+    def get(self, key: str):
+        return self.sessions.get(key)
+
+    def save(self, key: str, session: dict[str, Any]):
+        self.sessions[key] = session
+        self.store.async_delay_save(self._data, AUTH_SAVE_DELAY)
+
+    def remove(self, key: str):
+        if self.sessions.pop(key, None) is not None:
+            self.store.async_delay_save(self._data, AUTH_SAVE_DELAY)
+
+    def _data(self):
+        return {"sessions": self.sessions}
+
+
+async def async_get_auth_store(hass: HomeAssistant) -> AuthStore:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "auth_store" not in domain_data:
+        auth_store = AuthStore(hass)
+        await auth_store.async_load()
+        domain_data.setdefault("auth_store", auth_store)
+    return domain_data["auth_store"]
+
+
+def snapshot_store(hass: HomeAssistant, spa_id: str) -> Store:
+    """Last known coordinator state and task timestamps for one spa."""
+    return Store(hass, STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{spa_id}")
@@ -23,9 +23,9 @@ async def async_setup_entry(
 ) -> bool:
     entities = []
 
-    for coordinator in hass.data[DOMAIN]["spas"]:
-        for k, v in coordinator.get_state(SK_PUMPS).items():
-            if v["hasSwitch"] and v["speeds"] == 1:
+    for coordinator in config_entry.runtime_data.values():
+        for k, v in coordinator.state.get(SK_PUMPS, {}).items():
+            if v.hasSwitch and v.speeds == 1:
                 entities.append(SpaSwitch(coordinator, f"Pump {k}", f"{SK_PUMPS}.{k}.state", partial(coordinator.set_pump, k)))
 
         entities.append(SpaSwitch(coordinator, f"Lights", f"{SK_LIGHTS}.state", coordinator.set_lights))
@@ -33,7 +33,7 @@ async def async_setup_entry(
         # One-touch sanitise / clean cycle (on = start the 20-min cycle, off = cancel).
         entities.append(SpaSwitch(coordinator, "Sanitise", SK_SANITISE, coordinator.set_sanitise))
 
-        for k, v in coordinator.get_state(SK_SLEEP_TIMERS).items():
+        for k, v in coordinator.state.get(SK_SLEEP_TIMERS, {}).items():
             entities.append(SpaSwitch(coordinator, f"Sleep Timer {k}", f"{SK_SLEEP_TIMERS}.{k}.state", partial(coordinator.set_sleep_timer, k)))
 
         if config_entry.options.get(OPT_ENABLE_HEAT_PUMP, False):
@@ -47,14 +47,15 @@ class SpaSwitch(SpaEntity, SwitchEntity):
     _attr_device_class = SwitchDeviceClass.SWITCH
 
     def __init__(self, coordinator, name, state_key, switch_callback) -> None:
-        super().__init__(coordinator, "switch", name)
+        super().__init__(coordinator, "switch", name, (state_key,))
         self.hass = coordinator.hass
         self._state_key = state_key
+        self._value = coordinator.accessor(state_key)
         self._switch_callback = switch_callback
 
     @property
     def is_on(self):
-        value = self.coordinator.get_state(self._state_key)
+        value = self._value()
         if value is None or value == "":
             return None
         if value == "on" or value == "auto":
@@ -18,7 +18,7 @@ async def async_setup_entry(
     async_add_entity: AddEntitiesCallback,
 ) -> bool:
     entities = []
-    for coordinator in hass.data[DOMAIN]["spas"]:
+    for coordinator in config_entry.runtime_data.values():
         if SK_SANITISE_TIME in coordinator.state:
             entities.append(SpaSanitiseTime(coordinator))
     async_add_entity(entities)
@@ -30,12 +30,13 @@ class SpaSanitiseTime(SpaEntity, TimeEntity):
     _attr_icon = "mdi:clock-outline"
 
     def __init__(self, coordinator) -> None:
-        super().__init__(coordinator, "time", "Sanitise Time")
+        super().__init__(coordinator, "time", "Sanitise Time", (SK_SANITISE_TIME,))
         self.hass = coordinator.hass
+        self._value = coordinator.accessor(SK_SANITISE_TIME)
 
     @property
     def native_value(self):
-        raw = self.coordinator.get_state(SK_SANITISE_TIME)
+        raw = self._value()
         if not raw or ":" not in str(raw):
             return None
         hh, mm = str(raw).split(":")[:2]
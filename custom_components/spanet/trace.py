@@ -0,0 +1,74 @@
+"""Structured debug tracing.
+
+Each subsystem traces through its own logger, so levels can be set separately
+in Home Assistant's logger configuration, e.g.::
+
+    logger:
+      logs:
+        custom_components.spanet.trace.command: debug
+        custom_components.spanet.trace.payload: debug
+
+Events are a name plus keyword fields. Nothing is formatted unless the event
+will be logged: fields given as callables are only called then, keys that
+carry credentials are redacted, and a subsystem can sample its debug events.
+"""
+import logging
+import random
+
+REDACTED = "**REDACTED**"
+REDACT_KEYS = {
+    "password",
+    "email",
+    "access_token",
+    "refresh_token",
+    "refreshToken",
+    "token",
+    "Authorization",
+}
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACT_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class _Fields:
+    """Formats an event's fields when (and only if) a handler emits it."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        parts = []
+        for key, value in self.fields.items():
+            if callable(value):
+                value = value()
+            if hasattr(value, "as_dict"):
+                value = value.as_dict()
+            parts.append(f"{key}={REDACTED if key in REDACT_KEYS else redact(value)!r}")
+        return " ".join(parts)
+
+
+class Tracer:
+    def __init__(self, subsystem: str, sample: float = 1.0):
+        self.logger = logging.getLogger(f"{__package__}.trace.{subsystem}")
+        # Fraction of debug events kept; higher levels are never sampled.
+        self.sample = sample
+
+    def event(self, level, name: str, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        if level <= logging.DEBUG and self.sample < 1 and random.random() >= self.sample:
+            return
+        self.logger.log(level, "%s %s", name, _Fields(fields))
+
+    def debug(self, name: str, **fields):
+        self.event(logging.DEBUG, name, **fields)
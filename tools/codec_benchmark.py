@@ -0,0 +1,107 @@
+"""Micro-benchmark of the JSON codec used by the SpaNET client.
+
+Compares the old path (aiohttp's response.json(): decode the body to str, then
+stdlib json.loads) with the codec module's bytes parsing, for payloads shaped
+like the Dashboard and Information endpoints, plus encoding a command body:
+
+    python tools/codec_benchmark.py [--number 20000]
+
+Install orjson to see both backends; without it only stdlib is measured.
+"""
+import argparse
+import importlib.util
+import json
+import pathlib
+import timeit
+
+CODEC = pathlib.Path(__file__).parents[1] / "custom_components" / "spanet" / "codec.py"
+
+DASHBOARD = {
+    "deviceId": 1001,
+    "setTemperature": 380,
+    "currentTemperature": 372,
+    "statusList": ["Heating", "Filtering Cycle 1", "Sleeping"],
+    "sanitiseOn": False,
+    "statusFlags": {"SanitiseOn": False, "Filtering": True, "Heating": True, "Sleeping": True},
+    "heaterTemperature": 385,
+    "ambientTemperature": 214,
+    "powerSaveMode": "Low",
+    "operationMode": "NORM",
+    "filtrationStatus": "Running",
+    "lastUpdated": "2026-10-18T09:32:11.000Z",
+    "online": True,
+}
+
+INFORMATION = {
+    "information": {
+        "deviceId": 1001,
+        "name": "Backyard Spa",
+        "macAddress": "02:00:00:00:00:01",
+        "firmwareVersion": "SV3 3.14.2",
+        "controllerModel": "SV3",
+        "serialNumber": "SN-0001234567",
+        "installDate": "2021-11-02",
+        "settingsSummary": {
+            "operationMode": "NORM",
+            "powersaveTimer": {"mode": 2, "startTime": "18:00", "endTime": "22:00"},
+            "heatPumpMode": "0",
+            "hpElementBoost": "0",
+            "filtrationRuntime": 4,
+            "filtrationCycle": 6,
+            "sanitiseTime": "09:00",
+            "timeout": 20,
+            "lockMode": 1,
+            "sleepTimers": [
+                {"id": 10015 + n, "timerNumber": n, "isEnabled": n == 1, "startTime": "22:00",
+                 "endTime": "06:00", "daysHex": "7F", "days": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]}
+                for n in (1, 2)
+            ],
+        },
+        "electricalSummary": {
+            "supplyVoltage": 240, "phases": 1, "currentLimit": 15, "heaterCurrent": 10,
+            "pumps": [{"pumpNumber": n, "current": 4.5, "hours": 1234 + n} for n in (1, 2, 3)],
+        },
+        "faults": [{"code": "ER-5", "description": "Water temperature sensor", "date": "2025-01-0%dT00:00:00Z" % n} for n in range(1, 6)],
+    }
+}
+
+COMMAND = {"deviceId": "1001", "modeId": 1, "pumpVariableSpeed": 0}
+
+
+def load_codec():
+    spec = importlib.util.spec_from_file_location("spanet_codec", CODEC)
+    codec = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(codec)
+    return codec
+
+
+def stdlib_response_json(body: bytes):
+    # What aiohttp's ClientResponse.json() does with the default loads.
+    return json.loads(body.decode("utf-8"))
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"  {label:<34} {seconds / number * 1e6:8.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    codec = load_codec()
+    print(f"codec backend: {codec.BACKEND}")
+    for name, payload in (("Dashboard", DASHBOARD), ("Information", INFORMATION)):
+        body = json.dumps(payload).encode()
+        print(f"{name} ({len(body)} bytes)")
+        bench("decode + json.loads (old)", lambda: stdlib_response_json(body), args.number)
+        bench(f"codec.loads ({codec.BACKEND})", lambda: codec.loads(body), args.number)
+
+    print("Command body")
+    bench("json.dumps (old)", lambda: json.dumps(COMMAND), args.number)
+    bench(f"codec.dumps ({codec.BACKEND})", lambda: codec.dumps(COMMAND), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""Local stand-in for the SpaNET cloud API.
+
+Serves the endpoints the integration uses with simulated spas whose state
+follows the commands sent to them, so polling, command and error-handling
+changes can be exercised without a real spa:
+
+    python tools/spanet_simulator.py --spas 2 --latency 0.3 --error-rate 0.05
+
+Then add the integration with Home Assistant's advanced mode enabled and set
+the URL to http://<host>:8080/api (any email, password "spanet" unless
+--password is given).
+
+Fault injection: --latency/--jitter delay every response, --error-rate answers
+with a 500, --throttle-rate with a 429 and Retry-After, and --token-ttl makes
+access tokens expire quickly to exercise refreshes. --time-scale speeds up the
+water temperature and filtration model.
+
+GET /_stats returns request counts per route, injected faults and how long
+commands took to show up in a subsequent GET of the affected endpoint.
+
+With --lan-port, each spa also answers the WiFi module line protocol subset
+used by custom_components/spanet/local.py (spa N on lan-port + N - 1), so the
+"Local spa addresses" option can be pointed at it. LAN requests share the same
+latency and error injection (errors drop the connection).
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+SECRET = b"spanet-simulator"
+LIGHT_COLOURS = ["white", "red", "orange", "lime", "green", "teal", "blue", "pink"]
+BLOWER_STATUS = {1: "off", 2: "vari", 3: "ramp"}
+LOCK_MODES = ["OFF", "PARTIAL", "FULL"]
+
+# Must match STATUS_FIELDS / PUMP_COMMANDS in custom_components/spanet/local.py.
+LAN_STATUS_FIELDS = {
+    "currentTemperature": ("R5", 16),
+    "heating": ("R5", 13),
+    "sleeping": ("R5", 11),
+    "sanitise": ("R5", 17),
+    "filtering": ("R5", 18),
+    "setTemperature": ("R6", 9),
+}
+LAN_PUMP_COMMANDS = {"S22": 1, "S23": 2, "S24": 3, "S25": 4, "S26": 5}
+LAN_ROWS = ("R2", "R3", "R4", "R5", "R6", "R7", "R9", "RA", "RB", "RC", "RE", "RG")
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_token(subject: str, ttl: int) -> str:
+    """An HS256 JWT; the integration only reads its exp claim."""
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    claims = _b64(json.dumps({"sub": subject, "exp": int(time.time()) + ttl}).encode())
+    signature = hmac.new(SECRET, f"{header}.{claims}".encode(), hashlib.sha256).digest()
+    return f"{header}.{claims}.{_b64(signature)}"
+
+
+class Spa:
+    """One simulated spa and the slow physics behind its dashboard."""
+
+    def __init__(self, number: int, time_scale: float):
+        self.id = str(1000 + number)
+        self.name = f"Simulated Spa {number}"
+        self.mac = f"02:00:00:00:00:{number:02x}"
+        self.time_scale = time_scale
+        self.updated = time.time()
+        self.set_temperature = 380
+        self.water_temperature = 360.0
+        self.sanitise_until = 0
+        self.filter_until = 0
+        self.pumps = {
+            n: {"id": int(self.id) * 10 + n, "on": False, "auto": n == 1}
+            for n in (1, 2, 3)
+        }
+        self.blower = {"id": int(self.id) * 10 + 9, "status": "off", "speed": 3}
+        self.light = {"id": int(self.id) * 10 + 8, "on": False, "mode": "colour",
+                      "colour": "blue", "brightness": 5, "speed": 3}
+        self.sleep_timers = {
+            n: {"id": int(self.id) * 10 + 4 + n, "enabled": False} for n in (1, 2)
+        }
+        self.operation_mode = 1
+        self.power_save = 1
+        self.heat_pump = 0
+        self.element_boost = False
+        self.filtration = {"totalRuntime": 4, "inBetweenCycles": 6}
+        self.timeout = 20
+        self.lock_mode = 1
+        self.sanitise_time = "09:00"
+
+    def advance(self):
+        now = time.time()
+        minutes = (now - self.updated) / 60 * self.time_scale
+        self.updated = now
+        if self.heating:
+            self.water_temperature = min(self.set_temperature, self.water_temperature + 0.8 * minutes)
+        else:
+            # Cools toward ambient (20C), faster the hotter the water.
+            self.water_temperature -= (self.water_temperature - 200) * 0.0004 * minutes
+        if self.filter_until < now and random.random() < 0.001 * minutes:
+            self.filter_until = now + 3600 / self.time_scale
+
+    @property
+    def heating(self):
+        return self.water_temperature < self.set_temperature - 5 or (
+            self.water_temperature < self.set_temperature and self.updated < self.filter_until
+        )
+
+    def dashboard(self):
+        now = time.time()
+        statuses = []
+        if self.heating:
+            statuses.append("Heating")
+        if now < self.sanitise_until:
+            statuses.append("Sanitise")
+        if now < self.filter_until:
+            statuses.append("Filtering")
+        if any(timer["enabled"] for timer in self.sleep_timers.values()):
+            statuses.append("Sleeping")
+        return {
+            "setTemperature": self.set_temperature,
+            "currentTemperature": int(round(self.water_temperature)),
+            "statusList": statuses or ["Idle"],
+            "sanitiseOn": now < self.sanitise_until,
+            "statusFlags": {"SanitiseOn": now < self.sanitise_until, "Filtering": now < self.filter_until},
+        }
+
+    def pumps_and_blower(self):
+        return {"pumpAndBlower": {
+            "pumps": [
+                {"id": pump["id"], "pumpNumber": n, "hasAuto": pump["auto"], "canSwitchOn": True,
+                 "pumpSpeed": 1, "pumpStatus": "on" if pump["on"] else ("auto" if pump["auto"] else "off")}
+                for n, pump in self.pumps.items()
+            ],
+            "blower": {"id": self.blower["id"], "blowerStatus": self.blower["status"],
+                       "blowerVariableSpeed": self.blower["speed"], "canSwitchOn": True},
+        }}
+
+    def information(self):
+        return {"information": {"settingsSummary": {
+            "operationMode": ["", "NORM", "ECON", "AWAY", "WEEK"][self.operation_mode],
+            "powersaveTimer": {"mode": self.power_save},
+            "heatPumpMode": str(self.heat_pump),
+            "hpElementBoost": "1" if self.element_boost else "0",
+            "sleepTimers": [
+                {"id": timer["id"], "timerNumber": n, "isEnabled": timer["enabled"]}
+                for n, timer in self.sleep_timers.items()
+            ],
+        }}}
+
+    def light_details(self):
+        light = self.light
+        return {"lightId": light["id"], "lightOn": light["on"], "lightMode": light["mode"],
+                "lightColour": light["colour"], "lightBrightness": light["brightness"],
+                "lightSpeed": light["speed"]}
+
+    def lan_status(self):
+        dashboard = self.dashboard()
+        values = {
+            "currentTemperature": dashboard["currentTemperature"],
+            "setTemperature": dashboard["setTemperature"],
+            "heating": int("Heating" in dashboard["statusList"]),
+            "sleeping": int("Sleeping" in dashboard["statusList"]),
+            "sanitise": int(dashboard["sanitiseOn"]),
+            "filtering": int("Filtering" in dashboard["statusList"]),
+        }
+        rows = {row: ["", row] + ["0"] * 20 for row in LAN_ROWS}
+        for name, (row, index) in LAN_STATUS_FIELDS.items():
+            rows[row][index] = str(values[name])
+        return ["RF:"] + [",".join(rows[row]) for row in LAN_ROWS]
+
+    def settings_details(self):
+        return {"timeout": str(self.timeout), "lockMode": LOCK_MODES[self.lock_mode - 1],
+                "sanitiseTime": self.sanitise_time}
+
+
+class Simulator:
+    def __init__(self, args):
+        self.args = args
+        self.spas = {spa.id: spa for spa in (Spa(n + 1, args.time_scale) for n in range(args.spas))}
+        self.tokens = {}
+        self.refresh_tokens = set()
+        self.requests = Counter()
+        self.faults = Counter()
+        # (spa id, GET route) -> time of the first unconfirmed command affecting it
+        self.pending = {}
+        self.confirmations = defaultdict(list)
+
+    # -- plumbing ---------------------------------------------------------
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        if request.path.startswith("/_"):
+            return await handler(request)
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.requests[f"{request.method} {route}"] += 1
+
+        delay = self.args.latency + random.uniform(0, self.args.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < self.args.throttle_rate:
+            self.faults["429"] += 1
+            return web.json_response({"message": "Too many requests"}, status=429,
+                                     headers={"Retry-After": str(self.args.retry_after)})
+        if random.random() < self.args.error_rate:
+            self.faults["500"] += 1
+            return web.json_response({"message": "Simulated failure"}, status=500)
+
+        if route not in ("/api/Login/Authenticate", "/api/OAuth/Token"):
+            token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if self.tokens.get(token, 0) < time.time():
+                self.faults["401"] += 1
+                return web.json_response({"message": "Unauthorized"}, status=401)
+
+        response = await handler(request)
+        if request.method == "GET" and response.status == 200:
+            etag = '"%s"' % hashlib.md5(response.body).hexdigest()
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+        if not self.args.no_compression and isinstance(response, web.Response) and response.body:
+            # gzip (or deflate/br) per the request's Accept-Encoding.
+            response.enable_compression()
+        return response
+
+    def spa(self, request, key="spa_id"):
+        spa = self.spas.get(request.match_info.get(key) or request.query.get("deviceId"))
+        if spa is None:
+            raise web.HTTPNotFound()
+        spa.advance()
+        return spa
+
+    def spa_for_device(self, body):
+        spa = self.spas.get(str(body.get("deviceId")))
+        if spa is None:
+            raise web.HTTPNotFound()
+        spa.advance()
+        return spa
+
+    def issue_tokens(self, subject):
+        access = make_token(subject, self.args.token_ttl)
+        refresh = uuid.uuid4().hex
+        self.tokens[access] = time.time() + self.args.token_ttl
+        self.refresh_tokens.add(refresh)
+        return {"access_token": access, "refresh_token": refresh}
+
+    def confirm(self, spa, route):
+        sent = self.pending.pop((spa.id, route), None)
+        if sent is not None:
+            self.confirmations[route].append(time.time() - sent)
+
+    def read(self, spa, route, data):
+        self.confirm(spa, route)
+        return web.json_response(data)
+
+    def changed(self, spa, route):
+        self.pending.setdefault((spa.id, route), time.time())
+        return web.json_response({"success": True})
+
+    # -- auth and devices -------------------------------------------------
+
+    async def login(self, request):
+        body = await request.json()
+        if self.args.password and body.get("password") != self.args.password:
+            return web.json_response({"message": "Invalid credentials"}, status=401)
+        return web.json_response(self.issue_tokens(body.get("email", "")))
+
+    async def refresh(self, request):
+        body = await request.json()
+        token = body.get("refreshToken")
+        if token not in self.refresh_tokens:
+            return web.json_response({"message": "Invalid refresh token"}, status=401)
+        self.refresh_tokens.discard(token)
+        return web.json_response(self.issue_tokens("refresh"))
+
+    async def devices(self, request):
+        return web.json_response({"devices": [
+            {"id": int(spa.id), "name": spa.name, "macAddress": spa.mac} for spa in self.spas.values()
+        ]})
+
+    # -- reads ------------------------------------------------------------
+
+    async def get_dashboard(self, request):
+        spa = self.spa(request)
+        return self.read(spa, "dashboard", spa.dashboard())
+
+    async def get_information(self, request):
+        spa = self.spa(request)
+        return self.read(spa, "information", spa.information())
+
+    async def get_pumps(self, request):
+        spa = self.spa(request)
+        return self.read(spa, "pumps", spa.pumps_and_blower())
+
+    async def get_lights(self, request):
+        spa = self.spa(request)
+        return self.read(spa, "lights", spa.light_details())
+
+    async def get_filtration(self, request):
+        spa = self.spa(request)
+        return self.read(spa, "filtration", dict(spa.filtration))
+
+    async def get_settings(self, request):
+        spa = self.spa(request)
+        return self.read(spa, "settings", spa.settings_details())
+
+    async def get_operation_mode(self, request):
+        spa = self.spa(request)
+        return web.json_response({"mode": spa.operation_mode})
+
+    async def get_power_save(self, request):
+        spa = self.spa(request)
+        return web.json_response({"mode": spa.power_save})
+
+    async def get_sleep_timers(self, request):
+        spa = self.spa(request)
+        return web.json_response(spa.information()["information"]["settingsSummary"]["sleepTimers"])
+
+    # -- commands ---------------------------------------------------------
+
+    async def set_temperature(self, request):
+        spa = self.spa(request)
+        spa.set_temperature = int((await request.json())["temperature"])
+        return self.changed(spa, "dashboard")
+
+    async def set_pump(self, request):
+        body = await request.json()
+        spa = self.spa_for_device(body)
+        pump = next(p for p in spa.pumps.values() if str(p["id"]) == request.match_info["item_id"])
+        pump["on"] = body["modeId"] == 1
+        return self.changed(spa, "pumps")
+
+    async def set_blower(self, request):
+        body = await request.json()
+        spa = self.spa_for_device(body)
+        spa.blower["status"] = BLOWER_STATUS.get(body["modeId"], "off")
+        if body.get("speed"):
+            spa.blower["speed"] = body["speed"]
+        return self.changed(spa, "pumps")
+
+    async def set_light(self, request):
+        body = await request.json()
+        spa = self.spa_for_device(body)
+        field = request.match_info["field"]
+        if field == "Status":
+            spa.light["on"] = bool(body["on"])
+        elif field == "Colour" and body["colour"] in LIGHT_COLOURS:
+            spa.light["colour"] = body["colour"]
+        elif field in ("Brightness", "Mode", "Speed"):
+            spa.light[field.lower()] = body[field.lower()]
+        else:
+            return web.json_response({"message": f"Bad light {field}"}, status=400)
+        return self.changed(spa, "lights")
+
+    async def set_sleep_timer(self, request):
+        body = await request.json()
+        spa = self.spa_for_device(body)
+        spa.sleep_timers[int(body["timerNumber"])]["enabled"] = bool(body["enabled"])
+        return self.changed(spa, "information")
+
+    async def set_setting(self, request):
+        spa = self.spa(request)
+        body = await request.json()
+        setting = request.match_info["setting"]
+        route = "settings"
+        if setting == "SanitiseStatus":
+            spa.sanitise_until = time.time() + 1200 / spa.time_scale if body["on"] else 0
+            route = "dashboard"
+        elif setting == "OperationMode":
+            spa.operation_mode, route = int(body["mode"]), "information"
+        elif setting == "PowerSave":
+            spa.power_save, route = int(body["mode"]), "information"
+        elif setting == "SetHeatPumpMode":
+            spa.heat_pump, route = int(body["mode"]) - 1, "information"
+        elif setting == "SetElementBoost":
+            spa.element_boost, route = bool(body["svElementBoost"]), "information"
+        elif setting == "Filtration":
+            spa.filtration.update({k: int(v) for k, v in body.items() if k in spa.filtration})
+            route = "filtration"
+        elif setting == "Timeout":
+            spa.timeout = int(body["timeout"])
+        elif setting == "Lock":
+            spa.lock_mode = int(body["lockMode"])
+        elif setting == "Sanitise":
+            spa.sanitise_time = body["time"]
+        else:
+            raise web.HTTPNotFound()
+        return self.changed(spa, route)
+
+    # -- LAN module -------------------------------------------------------
+
+    async def lan_client(self, spa, reader, writer):
+        try:
+            while line := (await reader.readline()).decode().strip():
+                self.requests[f"LAN {line.split(':')[0]}"] += 1
+                delay = self.args.latency + random.uniform(0, self.args.jitter)
+                if delay:
+                    await asyncio.sleep(delay)
+                if random.random() < self.args.error_rate:
+                    self.faults["lan"] += 1
+                    break
+                spa.advance()
+                command, _, value = line.partition(":")
+                if command == "RF":
+                    self.confirm(spa, "dashboard")
+                    reply = spa.lan_status()
+                elif command == "W40" and value.isdigit():
+                    spa.set_temperature = int(value)
+                    self.changed(spa, "dashboard")
+                    reply = [f"{command}:{value}"]
+                elif command in LAN_PUMP_COMMANDS and value in ("0", "1", "4"):
+                    spa.pumps[LAN_PUMP_COMMANDS[command]]["on"] = value == "1"
+                    self.changed(spa, "pumps")
+                    reply = [f"{command}:{value}"]
+                else:
+                    reply = ["ERROR"]
+                writer.write("".join(row + "\r\n" for row in reply).encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start_lan(self, app):
+        servers = []
+        for number, spa in enumerate(self.spas.values()):
+            port = self.args.lan_port + number
+            servers.append(await asyncio.start_server(
+                lambda reader, writer, spa=spa: self.lan_client(spa, reader, writer),
+                self.args.host, port,
+            ))
+            print(f"{spa.name} WiFi module on port {port}")
+        yield
+        for server in servers:
+            server.close()
+
+    # -- stats ------------------------------------------------------------
+
+    async def stats(self, request):
+        confirmations = {}
+        for route, samples in self.confirmations.items():
+            ordered = sorted(samples)
+            confirmations[route] = {
+                "count": len(ordered),
+                "median": round(statistics.median(ordered), 2),
+                "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 2),
+                "max": round(ordered[-1], 2),
+            }
+        return web.json_response({
+            "requests": dict(self.requests.most_common()),
+            "total": sum(self.requests.values()),
+            "faults": dict(self.faults),
+            "unconfirmed": len(self.pending),
+            "confirmation_seconds": confirmations,
+        })
+
+    async def reset_stats(self, request):
+        self.requests.clear()
+        self.faults.clear()
+        self.confirmations.clear()
+        return web.json_response({"success": True})
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.add_routes([
+            web.post("/api/Login/Authenticate", self.login),
+            web.post("/api/OAuth/Token", self.refresh),
+            web.get("/api/Devices", self.devices),
+            web.get("/api/Dashboard/{spa_id}", self.get_dashboard),
+            web.put("/api/Dashboard/{spa_id}", self.set_temperature),
+            web.get("/api/Information/{spa_id}", self.get_information),
+            web.get("/api/PumpsAndBlower/Get/{spa_id}", self.get_pumps),
+            web.put("/api/PumpsAndBlower/SetPump/{item_id}", self.set_pump),
+            web.put("/api/PumpsAndBlower/SetBlower/{item_id}", self.set_blower),
+            web.get("/api/Lights/GetLightDetails/{spa_id}", self.get_lights),
+            web.put("/api/Lights/SetLight{field}/{item_id}", self.set_light),
+            web.get("/api/SleepTimers/{spa_id}", self.get_sleep_timers),
+            web.put("/api/SleepTimers/{item_id}", self.set_sleep_timer),
+            web.get("/api/Settings/GetSettingsDetails", self.get_settings),
+            web.get("/api/Settings/Filtration/{spa_id}", self.get_filtration),
+            web.get("/api/Settings/OperationMode/{spa_id}", self.get_operation_mode),
+            web.get("/api/Settings/PowerSave/{spa_id}", self.get_power_save),
+            web.put("/api/Settings/{setting}/{spa_id}", self.set_setting),
+            web.get("/_stats", self.stats),
+            web.post("/_stats/reset", self.reset_stats),
+        ])
+        if self.args.lan_port:
+            app.cleanup_ctx.append(self.start_lan)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--spas", type=int, default=1, help="number of spas on the account")
+    parser.add_argument("--password", default="spanet", help="password to accept ('' accepts any)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=30, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="access token lifetime in seconds")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="speed up heating and filtration")
+    parser.add_argument("--no-compression", action="store_true", help="never compress response bodies")
+    parser.add_argument("--lan-port", type=int, help="also serve the LAN protocol, from this port")
+    parser.add_argument("--seed", type=int, help="seed the fault injection for repeatable runs")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    web.run_app(Simulator(args).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()